@@ -0,0 +1,88 @@
+# ai_services/semantic_index.py
+"""
+Redis-backed nearest-neighbour index for the chatbot's semantic cache tier
+
+Each chat context gets one capped Redis list. An entry is the digest of the
+exact-tier cache key followed by the unit-normalized question embedding as
+float32 bytes, so a lookup is one LRANGE and one matrix-vector product, and
+a store is one atomic RPUSH + LTRIM. Concurrent writers never overwrite each
+other, and hits never rewrite the list; the oldest entries are trimmed first.
+"""
+import hashlib
+from functools import lru_cache
+import numpy as np
+from django.conf import settings
+
+INDEX_KEY_PREFIX = 'ai:chatbot_semantic:'
+INDEX_TTL = 60 * 60 * 24  # 24 hours, refreshed on every store
+MAX_ENTRIES = 500
+
+# Embeddings are requested at this size (text-embedding-3 models shorten on request)
+EMBEDDING_DIMENSIONS = 256
+
+ENTRY_DTYPE = np.dtype([
+    ('digest', np.uint8, (32,)),
+    ('vector', '<f4', (EMBEDDING_DIMENSIONS,)),
+])
+
+
+@lru_cache(maxsize=None)
+def get_redis_client():
+    import redis
+    
+    return redis.Redis.from_url(settings.REDIS_URL)
+
+
+def _index_key(context):
+    return INDEX_KEY_PREFIX + hashlib.sha1((context or '').encode()).hexdigest()
+
+
+def _unit_vector(embedding):
+    """float32 unit vector of the embedding, None if it has the wrong shape or no length"""
+    vector = np.asarray(embedding, dtype='<f4')
+    if vector.shape != (EMBEDDING_DIMENSIONS,):
+        return None
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else None
+
+
+def is_empty(context):
+    """Whether nothing has been stored for this context yet"""
+    return not get_redis_client().exists(_index_key(context))
+
+
+def add(context, digest, embedding):
+    """Append one entry; `digest` is the 64-char hex digest of the exact-tier key"""
+    vector = _unit_vector(embedding)
+    if vector is None:
+        return
+    
+    entry = np.zeros((), dtype=ENTRY_DTYPE)
+    entry['digest'] = np.frombuffer(bytes.fromhex(digest), dtype=np.uint8)
+    entry['vector'] = vector
+    
+    key = _index_key(context)
+    pipe = get_redis_client().pipeline()
+    pipe.rpush(key, entry.tobytes())
+    pipe.ltrim(key, -MAX_ENTRIES, -1)
+    pipe.expire(key, INDEX_TTL)
+    pipe.execute()
+
+
+def nearest(context, embedding, threshold):
+    """Hex digest of the closest stored question with cosine similarity >= threshold"""
+    vector = _unit_vector(embedding)
+    if vector is None:
+        return None
+    
+    rows = [row for row in get_redis_client().lrange(_index_key(context), 0, -1)
+            if len(row) == ENTRY_DTYPE.itemsize]
+    if not rows:
+        return None
+    
+    entries = np.frombuffer(b''.join(rows), dtype=ENTRY_DTYPE)
+    scores = entries['vector'] @ vector
+    best = int(np.argmax(scores))
+    if scores[best] < threshold:
+        return None
+    return entries['digest'][best].tobytes().hex()
@@ -11,6 +11,7 @@ class ChatbotRequestSerializer(serializers.Serializer):
         default=[]
     )
     context = serializers.CharField(required=False, default="")
+    stream = serializers.BooleanField(required=False, default=False)
 
 
 class VoiceToTextSerializer(serializers.Serializer):
@@ -19,6 +20,7 @@ class VoiceToTextSerializer(serializers.Serializer):
     language = serializers.CharField(default='en-UG')
     job_category = serializers.CharField(required=False)
     experience_level = serializers.CharField(required=False, default='intermediate')
+    run_async = serializers.BooleanField(required=False, default=False)
 
 
 class OCRRequestSerializer(serializers.Serializer):
@@ -28,6 +30,7 @@ class OCRRequestSerializer(serializers.Serializer):
         choices=['national_id', 'passport', 'driver_license', 'other']
     )
     worker_id = serializers.UUIDField(required=False)
+    run_async = serializers.BooleanField(required=False, default=False)
 
 
 class InterviewQuestionsSerializer(serializers.Serializer):
@@ -1,13 +1,185 @@
 # ai/services.py
-import openai
-import json
+import asyncio
+import functools
+import orjson
+import hashlib
+import random
+import re
+import statistics
+import threading
+import time
+from asgiref.sync import async_to_sync
 from django.conf import settings
-from google.cloud import speech_v1p1beta1 as speech
-from google.cloud import vision
+from django.core.cache import cache
+from django.core.files.base import ContentFile
 import logging
+from ai_services import semantic_index
 
 logger = logging.getLogger(__name__)
 
+# Chatbot response cache
+CHATBOT_CACHE_TTL = 60 * 60 * 24  # 24 hours
+CHATBOT_HISTORY_CACHE_TTL = 60 * 60  # 1 hour
+CHATBOT_EXACT_KEY_PREFIX = 'chatbot_exact_'
+CHATBOT_SEMANTIC_THRESHOLD = 0.92
+CHATBOT_EMBEDDING_MODEL = "text-embedding-3-small"
+CHATBOT_EMBEDDING_TIMEOUT = 3  # seconds; the semantic tier is skipped past this
+CHATBOT_FALLBACK_RESPONSE = (
+    "I apologize, but I'm having trouble processing your request. "
+    "Please try again or contact our support team."
+)
+
+# Server-side chatbot conversations
+CHATBOT_CONVERSATION_TTL = 60 * 60  # 1 hour of inactivity
+CHATBOT_CONVERSATION_MAX_MESSAGES = 20
+
+# OpenAI retry policy: 1s, 2s, 4s, 8s (plus jitter) on rate limits and 5xx
+OPENAI_MAX_RETRIES = 4
+OPENAI_RETRY_BASE_DELAY = 1
+
+
+def _retryable_openai_errors():
+    import openai
+    
+    return (
+        openai.error.RateLimitError,
+        openai.error.APIError,
+        openai.error.ServiceUnavailableError,
+        openai.error.APIConnectionError,
+        openai.error.Timeout,
+    )
+
+
+def _retry_delay(attempt):
+    return OPENAI_RETRY_BASE_DELAY * (2 ** attempt) + random.uniform(0, OPENAI_RETRY_BASE_DELAY)
+
+
+def chat_completion(**kwargs):
+    """Blocking ChatCompletion call with exponential backoff on transient errors"""
+    import openai
+    
+    retryable = _retryable_openai_errors()
+    for attempt in range(OPENAI_MAX_RETRIES + 1):
+        try:
+            return openai.ChatCompletion.create(**kwargs)
+        except retryable as e:
+            if attempt == OPENAI_MAX_RETRIES:
+                raise
+            logger.warning(f"OpenAI transient error, retrying: {str(e)}")
+            time.sleep(_retry_delay(attempt))
+
+
+async def achat_completion(**kwargs):
+    """Non-blocking ChatCompletion call with exponential backoff on transient errors"""
+    import openai
+    
+    retryable = _retryable_openai_errors()
+    for attempt in range(OPENAI_MAX_RETRIES + 1):
+        try:
+            return await openai.ChatCompletion.acreate(**kwargs)
+        except retryable as e:
+            if attempt == OPENAI_MAX_RETRIES:
+                raise
+            logger.warning(f"OpenAI transient error, retrying: {str(e)}")
+            await asyncio.sleep(_retry_delay(attempt))
+
+
+# Sentiment keywords, matched as whole words of the casefolded text
+POSITIVE_WORDS = frozenset({'good', 'great', 'excellent', 'amazing', 'wonderful',
+                            'happy', 'pleased', 'satisfied', 'professional', 'reliable'})
+NEGATIVE_WORDS = frozenset({'bad', 'terrible', 'awful', 'poor', 'disappointed',
+                            'unhappy', 'late', 'rude', 'unprofessional'})
+GENERIC_REVIEW_PHRASES = ('best ever', 'amazing', 'perfect in every way',
+                          'worst ever', 'terrible experience')
+
+WORD_TOKEN_PATTERN = re.compile(r'[a-z]+')
+GENERIC_PHRASES_PATTERN = re.compile('|'.join(map(re.escape, GENERIC_REVIEW_PHRASES)))
+
+# Sentiment label by sign of (positive - negative) keyword hits
+SENTIMENT_LABELS = {1: "positive", 0: "neutral", -1: "negative"}
+
+# Interview questions are reused across employers hiring for the same profile
+INTERVIEW_QUESTIONS_CACHE_TTL = 60 * 60 * 24 * 7  # 7 days
+# Concurrent misses for the same profile wait for a single generation
+INTERVIEW_QUESTIONS_LOCK_TIMEOUT = 30  # seconds
+INTERVIEW_QUESTIONS_POLL_INTERVAL = 0.05  # seconds
+
+# Speech-to-text: sync recognize() handles up to ~1 minute of 16kHz LINEAR16
+STT_SYNC_MAX_BYTES = 16000 * 2 * 60
+STT_STREAM_CHUNK_SIZE = 16 * 1024
+STT_CACHE_TTL = 60 * 60 * 24 * 30  # 30 days
+
+# Google Vision accepts at most 16 images per batch_annotate_images request
+OCR_BATCH_SIZE = 16
+OCR_CACHE_TTL = 60 * 60 * 24 * 7  # 7 days
+OCR_CACHE_MIN_CONFIDENCE = 60  # don't pin poor reads; a rescan may do better
+
+# Fields that must be present for a fully confident ID card read
+ID_CARD_REQUIRED_FIELDS = ('id_number', 'surname', 'given_names', 'date_of_birth')
+
+# Ugandan National ID field patterns, in priority order per field
+ID_CARD_FIELD_PATTERNS = (
+    # CF followed by 12 digits and 3 letters
+    ("id_number", [
+        re.compile(r'([A-Z]{2}\d{12}[A-Z]{3})'),
+    ]),
+    ("surname", [
+        re.compile(r'SURNAME:\s*([A-Z\s]+)\n', re.IGNORECASE),
+        re.compile(r'([A-Z\s]+)\s+SURNAME', re.IGNORECASE),
+    ]),
+    ("given_names", [
+        re.compile(r'GIVEN NAMES?:\s*([A-Z\s]+)\n', re.IGNORECASE),
+        re.compile(r'([A-Z\s]+)\s+GIVEN', re.IGNORECASE),
+    ]),
+    ("sex", [
+        re.compile(r'SEX:\s*([MF])\b', re.IGNORECASE),
+        re.compile(r'\b([MF])\s+SEX\b', re.IGNORECASE),
+    ]),
+    ("date_of_birth", [
+        re.compile(r'DATE OF BIRTH:\s*(\d{2}/\d{2}/\d{4})'),
+        re.compile(r'Date of Birth:\s*(\d{2}/\d{2}/\d{4})'),
+        re.compile(r'DOB:\s*(\d{2}/\d{2}/\d{4})'),
+        re.compile(r'\b(\d{2}/\d{2}/\d{4})\b'),
+    ]),
+)
+
+
+# Google API clients hold a gRPC channel; build one per process and reuse it
+_google_client_lock = threading.Lock()
+
+
+@functools.lru_cache(maxsize=None)
+def _build_google_client(client_class, credentials):
+    return client_class.from_service_account_json(credentials)
+
+
+def _get_google_client(client_class, credentials):
+    with _google_client_lock:
+        return _build_google_client(client_class, credentials)
+
+
+def get_speech_client(credentials):
+    from google.cloud import speech_v1p1beta1 as speech
+    
+    return _get_google_client(speech.SpeechClient, credentials)
+
+
+def get_vision_client(credentials):
+    from google.cloud import vision
+    
+    return _get_google_client(vision.ImageAnnotatorClient, credentials)
+
+
+@functools.lru_cache(maxsize=None)
+def get_service(service_class):
+    """
+    Shared instance of an AI service class
+    
+    Services hold only configuration and process-wide clients, so one
+    instance per process can serve every request and task.
+    """
+    return service_class()
+
 
 class AIService:
     """Base AI service class"""
@@ -17,16 +189,145 @@ class AIService:
         self.google_credentials = settings.GOOGLE_CLOUD_CREDENTIALS
         
         if self.openai_api_key:
+            import openai
             openai.api_key = self.openai_api_key
 
 
+class ConversationStore:
+    """
+    Chatbot conversation history kept server-side in the cache
+    
+    Clients only send the new message each turn instead of re-uploading the
+    whole history. The store keeps the most recent messages and expires
+    after an hour of inactivity.
+    """
+    
+    def __init__(self, conversation_id):
+        self.cache_key = f"chatbot_conversation_{conversation_id}"
+    
+    def get(self):
+        return cache.get(self.cache_key, [])
+    
+    def save_turn(self, history, user_message, answer):
+        """Persist `history` followed by the new user/assistant exchange"""
+        messages = list(history) + [
+            {"role": "user", "content": user_message},
+            {"role": "assistant", "content": answer}
+        ]
+        cache.set(
+            self.cache_key,
+            messages[-CHATBOT_CONVERSATION_MAX_MESSAGES:],
+            timeout=CHATBOT_CONVERSATION_TTL
+        )
+
+
 class ChatbotService(AIService):
     """AI Chatbot service"""
     
     def get_response(self, user_message, conversation_history=None, context=None):
         """
         24/7 AI chatbot for customer support
+        
+        Answers are served from cache first: an exact match on the
+        normalized message, history and context, then (for standalone
+        questions only) a semantic match on the message embedding.
+        """
+        exact_key, embedding, cached = self._lookup_cached_response(
+            user_message, conversation_history, context
+        )
+        if cached is not None:
+            return {
+                "success": True,
+                "response": cached,
+                "tokens_used": 0,
+                "cached": True
+            }
+        
+        try:
+            response = chat_completion(
+                model="gpt-3.5-turbo",  # Using GPT-3.5 for cost efficiency
+                messages=self._build_messages(user_message, conversation_history, context),
+                max_tokens=300,
+                temperature=0.7,
+                timeout=30
+            )
+            
+            answer = response.choices[0].message.content
+            
+            self._store_response(exact_key, embedding, context, answer, conversation_history, user_message)
+            
+            return {
+                "success": True,
+                "response": answer,
+                "tokens_used": response.usage.total_tokens,
+                "cached": False
+            }
+            
+        except Exception as e:
+            logger.error(f"OpenAI API error: {str(e)}")
+            return {
+                "success": False,
+                "response": CHATBOT_FALLBACK_RESPONSE,
+                "error": str(e)
+            }
+    
+    def stream_response(self, user_message, conversation_history=None, context=None):
         """
+        Streaming variant of get_response.
+        
+        Yields text fragments as the model produces them; cached answers are
+        yielded whole. The complete answer is cached once the stream ends.
+        """
+        exact_key, embedding, cached = self._lookup_cached_response(
+            user_message, conversation_history, context
+        )
+        if cached is not None:
+            yield cached
+            return
+        
+        parts = []
+        try:
+            response = chat_completion(
+                model="gpt-3.5-turbo",
+                messages=self._build_messages(user_message, conversation_history, context),
+                max_tokens=300,
+                temperature=0.7,
+                timeout=30,
+                stream=True
+            )
+            
+            for chunk in response:
+                delta = chunk.choices[0].delta.get('content')
+                if delta:
+                    parts.append(delta)
+                    yield delta
+            
+        except Exception as e:
+            logger.error(f"OpenAI API error: {str(e)}")
+            if not parts:
+                yield CHATBOT_FALLBACK_RESPONSE
+            return
+        
+        self._store_response(
+            exact_key, embedding, context, "".join(parts), conversation_history, user_message
+        )
+    
+    def _lookup_cached_response(self, user_message, conversation_history, context):
+        """Return (exact_key, embedding, cached_answer) for a chatbot request"""
+        normalized = self.normalize_message(user_message)
+        exact_key = self._exact_cache_key(normalized, conversation_history, context)
+        embedding = None
+        
+        cached = cache.get(exact_key)
+        # Only embed up front when there is something to compare against;
+        # otherwise the question is embedded in the background after answering
+        if cached is None and not conversation_history and not semantic_index.is_empty(context):
+            embedding = self._get_embedding(normalized)
+            cached = self._semantic_lookup(embedding, context)
+        
+        return exact_key, embedding, cached
+    
+    def _build_messages(self, user_message, conversation_history, context):
         system_prompt = """
         You are a helpful customer service assistant for WorkConnect Uganda,
         a domestic worker recruitment platform. 
@@ -56,28 +357,66 @@ class ChatbotService(AIService):
         # Add current message
         messages.append({"role": "user", "content": user_message})
         
+        return messages
+    
+    @staticmethod
+    def normalize_message(message):
+        """Lowercase, collapse whitespace and drop trailing punctuation"""
+        return re.sub(r'\s+', ' ', message).strip().lower().rstrip('?!. ')
+    
+    @staticmethod
+    def _exact_cache_key(normalized, conversation_history, context):
+        payload = orjson.dumps(
+            {"message": normalized, "history": conversation_history or [], "context": context or ''},
+            option=orjson.OPT_SORT_KEYS
+        )
+        return CHATBOT_EXACT_KEY_PREFIX + hashlib.sha256(payload).hexdigest()
+    
+    def _get_embedding(self, text):
+        """Embed text for the semantic cache tier; None if unavailable"""
+        import openai
+        
         try:
-            response = openai.ChatCompletion.create(
-                model="gpt-3.5-turbo",  # Using GPT-3.5 for cost efficiency
-                messages=messages,
-                max_tokens=300,
-                temperature=0.7,
-                timeout=30
+            response = openai.Embedding.create(
+                model=CHATBOT_EMBEDDING_MODEL,
+                input=text,
+                dimensions=semantic_index.EMBEDDING_DIMENSIONS,
+                request_timeout=CHATBOT_EMBEDDING_TIMEOUT
             )
-            
-            return {
-                "success": True,
-                "response": response.choices[0].message.content,
-                "tokens_used": response.usage.total_tokens
-            }
-            
+            return response['data'][0]['embedding']
         except Exception as e:
-            logger.error(f"OpenAI API error: {str(e)}")
-            return {
-                "success": False,
-                "response": "I apologize, but I'm having trouble processing your request. Please try again or contact our support team.",
-                "error": str(e)
-            }
+            logger.warning(f"Embedding error, skipping semantic cache: {str(e)}")
+            return None
+    
+    def _semantic_lookup(self, embedding, context):
+        """Return the cached answer of the nearest stored question, if close enough"""
+        if embedding is None:
+            return None
+        
+        digest = semantic_index.nearest(context, embedding, CHATBOT_SEMANTIC_THRESHOLD)
+        if digest is None:
+            return None
+        
+        # None when the exact entry has expired; the index entry ages out on its own
+        return cache.get(CHATBOT_EXACT_KEY_PREFIX + digest)
+    
+    def _store_response(self, exact_key, embedding, context, answer, conversation_history=None,
+                        user_message=None):
+        """Populate both cache tiers after a successful completion"""
+        # Mid-conversation answers are only reused briefly
+        timeout = CHATBOT_HISTORY_CACHE_TTL if conversation_history else CHATBOT_CACHE_TTL
+        cache.set(exact_key, answer, timeout=timeout)
+        
+        if conversation_history:
+            return
+        
+        digest = exact_key[len(CHATBOT_EXACT_KEY_PREFIX):]
+        if embedding is not None:
+            semantic_index.add(context, digest, embedding)
+        elif user_message:
+            # Embed off the request path
+            from ai_services.tasks import index_chatbot_question
+            index_chatbot_question.delay(context, digest, self.normalize_message(user_message))
 
 
 class VoiceToTextService(AIService):
@@ -86,16 +425,35 @@ class VoiceToTextService(AIService):
     def __init__(self):
         super().__init__()
         if self.google_credentials:
-            self.client = speech.SpeechClient.from_service_account_json(
-                self.google_credentials
-            )
+            self.client = get_speech_client(self.google_credentials)
     
     def transcribe_audio(self, audio_content, language_code='en-UG'):
         """
         Convert voice recording to text
         """
+        return self.transcribe_audio_file(ContentFile(audio_content), language_code)
+    
+    def transcribe_audio_file(self, audio_file, language_code='en-UG'):
+        """
+        Convert a voice recording file (upload or storage file) to text
+        
+        The file is hashed and streamed chunk by chunk, so long recordings
+        never have to be held in memory whole. Transcripts are cached by
+        audio content hash, so re-uploads of the same recording skip Google
+        entirely.
+        """
+        from google.cloud import speech_v1p1beta1 as speech
+        
+        digest = hashlib.sha256()
+        for chunk in audio_file.chunks():
+            digest.update(chunk)
+        
+        cache_key = f"stt_{language_code}_{digest.hexdigest()}"
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return {"success": True, **cached, "cached": True}
+        
         try:
-            audio = speech.RecognitionAudio(content=audio_content)
             config = speech.RecognitionConfig(
                 encoding=speech.RecognitionConfig.AudioEncoding.LINEAR16,
                 sample_rate_hertz=16000,
@@ -104,18 +462,23 @@ class VoiceToTextService(AIService):
                 model='latest_long'
             )
             
-            response = self.client.recognize(config=config, audio=audio)
+            if audio_file.size <= STT_SYNC_MAX_BYTES:
+                audio_file.seek(0)
+                audio = speech.RecognitionAudio(content=audio_file.read())
+                results = self.client.recognize(config=config, audio=audio).results
+            else:
+                results = self._streaming_results(config, audio_file)
             
             # Combine all transcripts
-            transcript = ""
-            for result in response.results:
-                transcript += result.alternatives[0].transcript + " "
+            best = [result.alternatives[0] for result in results if result.alternatives]
             
-            return {
-                "success": True,
-                "transcript": transcript.strip(),
-                "confidence": result.alternatives[0].confidence if result.alternatives else 0
+            transcription = {
+                "transcript": " ".join(alt.transcript.strip() for alt in best),
+                "confidence": statistics.mean(alt.confidence for alt in best) if best else 0
             }
+            cache.set(cache_key, transcription, timeout=STT_CACHE_TTL)
+            
+            return {"success": True, **transcription}
             
         except Exception as e:
             logger.error(f"Google Speech-to-Text error: {str(e)}")
@@ -125,43 +488,46 @@ class VoiceToTextService(AIService):
                 "transcript": ""
             }
     
+    def _streaming_results(self, config, audio_file):
+        """Recognize long audio with streaming_recognize, returning final results"""
+        from google.cloud import speech_v1p1beta1 as speech
+        
+        streaming_config = speech.StreamingRecognitionConfig(config=config)
+        requests = (
+            speech.StreamingRecognizeRequest(audio_content=chunk)
+            for chunk in audio_file.chunks(STT_STREAM_CHUNK_SIZE)
+        )
+        
+        responses = self.client.streaming_recognize(config=streaming_config, requests=requests)
+        return [
+            result
+            for response in responses
+            for result in response.results
+            if result.is_final
+        ]
+    
     def structure_job_posting(self, transcript):
         """
         Convert transcript to structured job posting using OpenAI
         """
-        prompt = f"""
-        Convert this voice transcript into a structured job posting for a domestic worker:
-        
-        Transcript: "{transcript}"
-        
-        Extract and return valid JSON with the following structure:
-        {{
-            "job_title": "string (e.g., 'Nanny for Infant', 'Housekeeper')",
-            "category": "string (e.g., 'Childcare', 'Housekeeping')",
-            "description": "string (detailed job description)",
-            "requirements": ["string", "string"] (list of requirements),
-            "salary_range": {{"min": number, "max": number}},
-            "start_date": "string (e.g., 'Next week', '2024-02-01')",
-            "work_schedule": "string (e.g., 'Monday to Friday, 8am-5pm')"
-        }}
-        
-        If you cannot determine a value, use null.
-        """
+        prompt = (
+            "Extract a domestic worker job posting from this voice transcript as JSON "
+            "with keys job_title, category, description, requirements (list of strings), "
+            "salary_range ({min, max} numbers), start_date, work_schedule. "
+            "Use null for unknown values.\n"
+            f'Transcript: "{transcript}"'
+        )
         
         try:
-            response = openai.ChatCompletion.create(
+            response = chat_completion(
                 model="gpt-3.5-turbo",
                 messages=[{"role": "user", "content": prompt}],
-                max_tokens=500,
+                response_format={"type": "json_object"},
+                max_tokens=400,
                 temperature=0.3
             )
             
-            # Parse JSON response
-            json_str = response.choices[0].message.content
-            # Clean the response (remove markdown code blocks)
-            json_str = json_str.replace('```json', '').replace('```', '').strip()
-            
-            structured_data = json.loads(json_str)
+            structured_data = orjson.loads(response.choices[0].message.content)
             
             return {
                 "success": True,
@@ -184,14 +550,22 @@ class OCRService(AIService):
     def __init__(self):
         super().__init__()
         if self.google_credentials:
-            self.client = vision.ImageAnnotatorClient.from_service_account_json(
-                self.google_credentials
-            )
+            self.client = get_vision_client(self.google_credentials)
     
     def extract_id_card_data(self, image_content):
         """
         Extract text from Ugandan National ID card
+        
+        Confident results are cached by image content hash, so re-uploads of
+        the same scan skip Google entirely.
         """
+        from google.cloud import vision
+        
+        cache_key = self._cache_key(image_content)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return {**cached, "cached": True}
+        
         try:
             image = vision.Image(content=image_content)
             
@@ -205,20 +579,10 @@ class OCRService(AIService):
                     "error": "No text found in image"
                 }
             
-            full_text = texts[0].description
+            result = self._build_id_card_result(texts[0].description)
+            self._cache_result(cache_key, result)
             
-            # Extract specific fields using pattern matching
-            extracted_data = self.parse_id_card_text(full_text)
-            
-            # Calculate confidence
-            confidence = self.calculate_confidence(extracted_data)
-            
-            return {
-                "success": True,
-                "full_text": full_text,
-                "extracted_data": extracted_data,
-                "confidence": confidence
-            }
+            return result
             
         except Exception as e:
             logger.error(f"Google Vision API error: {str(e)}")
@@ -227,10 +591,78 @@ class OCRService(AIService):
                 "error": str(e)
             }
     
+    def extract_id_card_data_batch(self, image_contents):
+        """
+        Extract ID card data from many images, OCR_BATCH_SIZE images per
+        Vision request. Results are returned in input order.
+        """
+        from google.cloud import vision
+        
+        cache_keys = [self._cache_key(content) for content in image_contents]
+        cached = cache.get_many(cache_keys)
+        
+        # Only images without a cached result go to Vision
+        pending = [
+            (key, content)
+            for key, content in zip(cache_keys, image_contents)
+            if key not in cached
+        ]
+        ocr_results = {}
+        feature = vision.Feature(type_=vision.Feature.Type.DOCUMENT_TEXT_DETECTION)
+        
+        for start in range(0, len(pending), OCR_BATCH_SIZE):
+            chunk_keys, chunk = zip(*pending[start:start + OCR_BATCH_SIZE])
+            try:
+                batch_response = self.client.batch_annotate_images(requests=[
+                    vision.AnnotateImageRequest(
+                        image=vision.Image(content=content),
+                        features=[feature]
+                    )
+                    for content in chunk
+                ])
+            except Exception as e:
+                logger.error(f"Google Vision API error: {str(e)}")
+                for key in chunk_keys:
+                    ocr_results[key] = {"success": False, "error": str(e)}
+                continue
+            
+            for key, response in zip(chunk_keys, batch_response.responses):
+                if response.error.message:
+                    ocr_results[key] = {"success": False, "error": response.error.message}
+                elif not response.full_text_annotation.text:
+                    ocr_results[key] = {"success": False, "error": "No text found in image"}
+                else:
+                    ocr_results[key] = self._build_id_card_result(response.full_text_annotation.text)
+                    self._cache_result(key, ocr_results[key])
+        
+        return [
+            {**cached[key], "cached": True} if key in cached else ocr_results[key]
+            for key in cache_keys
+        ]
+    
+    def _cache_key(self, image_content):
+        return f"ocr_{hashlib.sha256(image_content).hexdigest()}"
+    
+    def _cache_result(self, cache_key, result):
+        if result['confidence'] >= OCR_CACHE_MIN_CONFIDENCE:
+            cache.set(cache_key, result, timeout=OCR_CACHE_TTL)
+    
+    def _build_id_card_result(self, full_text):
+        # Extract specific fields using pattern matching
+        extracted_data = self.parse_id_card_text(full_text)
+        
+        # Calculate confidence
+        confidence = self.calculate_confidence(extracted_data)
+        
+        return {
+            "success": True,
+            "full_text": full_text,
+            "extracted_data": extracted_data,
+            "confidence": confidence
+        }
+    
     def parse_id_card_text(self, text):
         """Parse ID card text to extract structured data"""
-        import re
-        
         data = {
             "id_number": None,
             "surname": None,
@@ -241,73 +673,19 @@ class OCRService(AIService):
             "nationality": None
         }
         
-        # Extract ID number (pattern: CF followed by 12 digits and 3 letters)
-        id_pattern = r'[A-Z]{2}\d{12}[A-Z]{3}'
-        id_match = re.search(id_pattern, text)
-        if id_match:
-            data["id_number"] = id_match.group(0)
-        
-        # Extract names (common patterns in Ugandan IDs)
-        name_patterns = [
-            r'SURNAME:\s*([A-Z\s]+)\n',
-            r'Surname:\s*([A-Z\s]+)\n',
-            r'([A-Z\s]+)\s+SURNAME'
-        ]
-        
-        for pattern in name_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                data["surname"] = match.group(1).strip()
-                break
-        
-        # Extract given names
-        given_name_patterns = [
-            r'GIVEN NAMES?:\s*([A-Z\s]+)\n',
-            r'Given names?:\s*([A-Z\s]+)\n',
-            r'([A-Z\s]+)\s+GIVEN'
-        ]
-        
-        for pattern in given_name_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                data["given_names"] = match.group(1).strip()
-                break
-        
-        # Extract sex
-        sex_patterns = [
-            r'SEX:\s*([MF])\b',
-            r'Sex:\s*([MF])\b',
-            r'\b([MF])\s+SEX\b'
-        ]
-        
-        for pattern in sex_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                data["sex"] = match.group(1)
-                break
-        
-        # Extract date of birth
-        dob_patterns = [
-            r'DATE OF BIRTH:\s*(\d{2}/\d{2}/\d{4})',
-            r'Date of Birth:\s*(\d{2}/\d{2}/\d{4})',
-            r'DOB:\s*(\d{2}/\d{2}/\d{4})',
-            r'\b(\d{2}/\d{2}/\d{4})\b'
-        ]
-        
-        for pattern in dob_patterns:
-            match = re.search(pattern, text)
-            if match:
-                data["date_of_birth"] = match.group(1)
-                break
+        for field, patterns in ID_CARD_FIELD_PATTERNS:
+            for pattern in patterns:
+                match = pattern.search(text)
+                if match:
+                    data[field] = match.group(1).strip()
+                    break
         
         return data
     
     def calculate_confidence(self, data):
         """Calculate confidence score based on extracted data completeness"""
-        required_fields = ['id_number', 'surname', 'given_names', 'date_of_birth']
-        
-        filled_fields = sum(1 for field in required_fields if data.get(field))
-        confidence = (filled_fields / len(required_fields)) * 100
+        filled_fields = sum(1 for field in ID_CARD_REQUIRED_FIELDS if data.get(field))
+        confidence = (filled_fields / len(ID_CARD_REQUIRED_FIELDS)) * 100
         
         return round(confidence, 2)
 
@@ -315,44 +693,62 @@ class OCRService(AIService):
 class InterviewQuestionService(AIService):
     """AI service for generating interview questions"""
     
-    def generate_questions(self, job_category, experience_level, specific_skills=None):
+    def generate_questions(self, job_category, experience_level, specific_skills=None, count=10):
         """
         Generate personalized interview questions
-        """
-        prompt = f"""
-        Generate 10 interview questions for hiring a {job_category} 
-        with {experience_level} experience level.
-        
-        Specific skills to assess: {', '.join(specific_skills or [])}
         
-        Include:
-        - 3 behavioral questions
-        - 4 skill-specific questions
-        - 2 scenario-based questions
-        - 1 motivation question
-        
-        Format as JSON array with question, purpose, and category.
+        Results are cached per (category, experience level, skills, count),
+        since many employers hire for the same profile. Concurrent requests
+        for an uncached profile are coalesced: one calls OpenAI while the
+        others wait for its result to land in the cache.
         """
+        cache_key = self._cache_key(job_category, experience_level, specific_skills, count)
+        lock_key = f"{cache_key}_lock"
+        
+        cached = cache.get(cache_key)
+        owns_lock = False
+        if cached is None:
+            owns_lock = cache.add(lock_key, True, timeout=INTERVIEW_QUESTIONS_LOCK_TIMEOUT)
+            if not owns_lock:
+                cached = self._wait_for_generation(cache_key, lock_key)
+        if cached is not None:
+            return self._cached_result(cached)
         
         try:
-            response = openai.ChatCompletion.create(
-                model="gpt-3.5-turbo",
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=1000,
-                temperature=0.7
+            response = chat_completion(
+                **self._completion_kwargs(job_category, experience_level, specific_skills, count)
             )
+            result = self._parse_response(response)
+            cache.set(cache_key, result["questions"], timeout=INTERVIEW_QUESTIONS_CACHE_TTL)
+            return result
             
-            # Parse JSON response
-            json_str = response.choices[0].message.content
-            json_str = json_str.replace('```json', '').replace('```', '').strip()
-            
-            questions = json.loads(json_str)
-            
+        except Exception as e:
+            logger.error(f"Error generating interview questions: {str(e)}")
             return {
-                "success": True,
-                "questions": questions,
-                "tokens_used": response.usage.total_tokens
+                "success": False,
+                "error": str(e),
+                "questions": []
             }
+        finally:
+            if owns_lock:
+                cache.delete(lock_key)
+    
+    async def agenerate_questions(self, job_category, experience_level, specific_skills=None, count=10):
+        """
+        Async variant of generate_questions, for concurrent bulk generation
+        """
+        cache_key = self._cache_key(job_category, experience_level, specific_skills, count)
+        cached = await cache.aget(cache_key)
+        if cached is not None:
+            return self._cached_result(cached)
+        
+        try:
+            response = await achat_completion(
+                **self._completion_kwargs(job_category, experience_level, specific_skills, count)
+            )
+            result = self._parse_response(response)
+            await cache.aset(cache_key, result["questions"], timeout=INTERVIEW_QUESTIONS_CACHE_TTL)
+            return result
             
         except Exception as e:
             logger.error(f"Error generating interview questions: {str(e)}")
@@ -360,4 +756,130 @@ class InterviewQuestionService(AIService):
                 "success": False,
                 "error": str(e),
                 "questions": []
-            }
\ No newline at end of file
+            }
+    
+    def generate_questions_many(self, requests):
+        """
+        Generate questions for many (job_category, experience_level, skills)
+        requests with all OpenAI calls in flight at once.
+        
+        `requests` is a list of generate_questions keyword-argument dicts;
+        results are returned in the same order.
+        """
+        async def gather():
+            return await asyncio.gather(
+                *(self.agenerate_questions(**kwargs) for kwargs in requests)
+            )
+        
+        return async_to_sync(gather)()
+    
+    @staticmethod
+    def _wait_for_generation(cache_key, lock_key):
+        """
+        Poll for another request's result; None if it failed or timed out,
+        in which case the caller generates on its own.
+        """
+        deadline = time.monotonic() + INTERVIEW_QUESTIONS_LOCK_TIMEOUT
+        while time.monotonic() < deadline:
+            time.sleep(INTERVIEW_QUESTIONS_POLL_INTERVAL)
+            
+            cached = cache.get(cache_key)
+            if cached is not None:
+                return cached
+            if cache.get(lock_key) is None:
+                return None
+        
+        return None
+    
+    @staticmethod
+    def _cache_key(job_category, experience_level, specific_skills, count):
+        skills = ','.join(sorted(skill.strip().lower() for skill in specific_skills or []))
+        raw = f"{job_category.strip().lower()}|{experience_level.strip().lower()}|{skills}|{count}"
+        return f'interview_questions_{hashlib.sha1(raw.encode()).hexdigest()}'
+    
+    @staticmethod
+    def _cached_result(questions):
+        return {
+            "success": True,
+            "questions": questions,
+            "tokens_used": 0,
+            "cached": True
+        }
+    
+    def _completion_kwargs(self, job_category, experience_level, specific_skills, count):
+        prompt = (
+            f"Write {count} interview questions for hiring a {job_category} "
+            f"with {experience_level} experience level. "
+            f"Skills to assess: {', '.join(specific_skills or []) or 'general'}. "
+            "Mix roughly 30% behavioral, 40% skill-specific, 20% scenario-based "
+            "and 10% motivation questions. "
+            'Return JSON: {"questions": [{"question": str, "purpose": str, "category": str}]}'
+        )
+        
+        return {
+            "model": "gpt-3.5-turbo",
+            "messages": [{"role": "user", "content": prompt}],
+            "response_format": {"type": "json_object"},
+            "max_tokens": 80 * count,
+            "temperature": 0.7
+        }
+    
+    def _parse_response(self, response):
+        questions = orjson.loads(response.choices[0].message.content)["questions"]
+        
+        return {
+            "success": True,
+            "questions": questions,
+            "tokens_used": response.usage.total_tokens
+        }
+
+
+class SentimentAnalyzer:
+    """Keyword-based sentiment analysis and fake review detection"""
+    
+    def analyze(self, text, analyze_fake_review=False):
+        """
+        Analyze sentiment of a review or free text
+        """
+        # Tokenize and fold case once; every check below reuses these
+        tokens = text.split()
+        word_count = len(tokens)
+        lower_text = text.casefold()
+        
+        # Basic sentiment analysis: number of distinct keywords present
+        words = set(WORD_TOKEN_PATTERN.findall(lower_text))
+        positive_count = len(POSITIVE_WORDS & words)
+        negative_count = len(NEGATIVE_WORDS & words)
+        
+        sentiment = SENTIMENT_LABELS[(positive_count > negative_count) - (negative_count > positive_count)]
+        
+        # Fake review detection (simple rules)
+        is_suspicious = False
+        red_flags = {}
+        
+        if analyze_fake_review:
+            red_flags = {
+                'too_short': word_count < 10,
+                'all_caps': text.isupper(),
+                'excessive_punctuation': lower_text.count('!') > 3 or lower_text.count('?') > 3,
+                'generic_phrases': GENERIC_PHRASES_PATTERN.search(lower_text) is not None,
+                'no_specifics': sum(1 for w in tokens if len(w) > 5) < 3
+            }
+            
+            is_suspicious = sum(red_flags.values()) >= 2
+        
+        return {
+            "sentiment": sentiment,
+            "confidence": min(100, max(0, abs(positive_count - negative_count) * 20)),
+            "analysis": {
+                "positive_words_found": positive_count,
+                "negative_words_found": negative_count,
+                "word_count": word_count,
+                "character_count": len(text)
+            },
+            "fake_review_detection": {
+                "is_suspicious": is_suspicious,
+                "red_flags": red_flags,
+                "recommendation": "Flag for review" if is_suspicious else "Looks genuine"
+            }
+        }
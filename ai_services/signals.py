@@ -1,68 +1,86 @@
 # ai_services/signals.py
+from django.db import transaction
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 from django.utils import timezone
 from users.models import WorkerProfile
 import logging
+import weakref
 
 logger = logging.getLogger(__name__)
 
 
+class _PendingAITasks:
+    """on_commit callback that enqueues the AI tasks queued in one transaction"""
+    
+    def __init__(self):
+        self.keys = {}  # insertion-ordered set of (task_name, instance_id)
+        self.done = False
+    
+    def __call__(self):
+        self.done = True
+        # Import here to avoid circular imports
+        from ai_services import tasks
+        
+        for task_name, instance_id in self.keys:
+            try:
+                getattr(tasks, task_name).delay(instance_id)
+            except Exception as e:
+                logger.error(f"Error triggering {task_name}: {str(e)}")
+
+
+def _enqueue_on_commit(task_name, instance_id):
+    """
+    Queue an AI task once the current transaction commits.
+    
+    Repeated saves of the same object inside one transaction enqueue the
+    task only once. The connection holds only a weak reference to the
+    transaction's pending batch: Django drops the callback on commit or
+    rollback, so the next transaction always starts a fresh batch.
+    """
+    key = (task_name, str(instance_id))
+    connection = transaction.get_connection()
+    
+    pending = getattr(connection, 'ai_pending_tasks', None)
+    batch = pending() if pending else None
+    if batch is not None and not batch.done:
+        batch.keys[key] = None
+        return
+    
+    batch = _PendingAITasks()
+    batch.keys[key] = None
+    # Outside a transaction on_commit runs the batch right away
+    connection.ai_pending_tasks = weakref.ref(batch) if connection.in_atomic_block else None
+    transaction.on_commit(batch)
+
+
 @receiver(post_save, sender=WorkerProfile)
 def trigger_ai_processing_on_profile_update(sender, instance, created, **kwargs):
     """Trigger AI processing when worker profile is updated"""
-    if instance.documents.exists() and not instance.ai_processed:
-        try:
-            # Import here to avoid circular imports
-            from ai_services.tasks import process_worker_documents_with_ai
-            
-            # Trigger background task for AI processing
-            process_worker_documents_with_ai.delay(str(instance.id))
-            
-        except Exception as e:
-            logger.error(f"Error triggering AI processing: {str(e)}")
+    update_fields = kwargs.get('update_fields')
+    if update_fields and set(update_fields) == {'ai_processed'}:
+        return
+    
+    if not instance.ai_processed and instance.documents.exists():
+        _enqueue_on_commit('process_worker_documents_with_ai', instance.id)
 
 
 @receiver(post_save, sender='job_postings.JobPosting')
 def trigger_ai_matching_on_new_job(sender, instance, created, **kwargs):
     """Trigger AI matching when new job posting is created"""
     if created and instance.status == 'active':
-        try:
-            # Import here to avoid circular imports
-            from ai_services.tasks import generate_ai_recommendations_for_job
-            
-            # Trigger background task for AI recommendations
-            generate_ai_recommendations_for_job.delay(str(instance.id))
-            
-        except Exception as e:
-            logger.error(f"Error triggering AI matching: {str(e)}")
+        _enqueue_on_commit('generate_ai_recommendations_for_job', instance.id)
 
 
 @receiver(post_save, sender='contracts.Contract')
 def trigger_ai_analysis_on_new_contract(sender, instance, created, **kwargs):
     """Trigger AI analysis when new contract is created"""
     if created:
-        try:
-            # Import here to avoid circular imports
-            from ai_services.tasks import analyze_contract_with_ai
-            
-            # Trigger background task for AI contract analysis
-            analyze_contract_with_ai.delay(str(instance.id))
-            
-        except Exception as e:
-            logger.error(f"Error triggering AI contract analysis: {str(e)}")
+        _enqueue_on_commit('analyze_contract_with_ai', instance.id)
 
 
 @receiver(post_save, sender='reviews.Review')
 def trigger_sentiment_analysis_on_review(sender, instance, created, **kwargs):
     """Trigger sentiment analysis when new review is posted"""
     if created:
-        try:
-            # Import here to avoid circular imports
-            from ai_services.tasks import analyze_review_sentiment
-            
-            # Trigger background task for sentiment analysis
-            analyze_review_sentiment.delay(str(instance.id))
-            
-        except Exception as e:
-            logger.error(f"Error triggering sentiment analysis: {str(e)}")
\ No newline at end of file
+        _enqueue_on_commit('analyze_review_sentiment', instance.id)
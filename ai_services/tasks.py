@@ -1,14 +1,22 @@
 # ai_services/tasks.py
-from celery import shared_task
+from celery import chord, shared_task
 from django.utils import timezone
+from datetime import date
 import logging
+import re
 from ai_services.services import (
     ChatbotService, VoiceToTextService, OCRService,
-    InterviewQuestionService, SentimentAnalyzer
+    InterviewQuestionService, SentimentAnalyzer, get_service
 )
 
 logger = logging.getLogger(__name__)
 
+# Date of birth as printed on Ugandan ID cards, DD/MM/YYYY
+DOB_PATTERN = re.compile(r'^(\d{1,2})/(\d{1,2})/(\d{4})$')
+
+# Review comments shorter than this are too short to analyze
+MIN_SENTIMENT_TEXT_LENGTH = 10
+
 
 @shared_task
 def process_worker_documents_with_ai(worker_id):
@@ -17,23 +25,22 @@ def process_worker_documents_with_ai(worker_id):
     
     try:
         worker = WorkerProfile.objects.get(id=worker_id)
-        ocr_service = OCRService()
+        documents = list(worker.documents.all())
         
         # Process each document
-        for document in worker.documents.all():
+        for document in documents:
             if document.document_type in ['national_id', 'passport']:
                 # Process document with OCR
                 # This would depend on your actual implementation
                 pass
         
-        # Mark as processed
-        worker.ai_processed = True
-        worker.save(update_fields=['ai_processed'])
+        # Mark as processed without a save(), so post_save handlers don't re-run
+        WorkerProfile.objects.filter(pk=worker.pk).update(ai_processed=True)
         
         return {
             "success": True,
             "worker_id": str(worker_id),
-            "documents_processed": worker.documents.count()
+            "documents_processed": len(documents)
         }
         
     except WorkerProfile.DoesNotExist:
@@ -117,15 +124,150 @@ def analyze_contract_with_ai(contract_id):
         return {"success": False, "error": str(e)}
 
 
+def voice_to_text_payload(audio_file, language_code='en-UG', structure_posting=False):
+    """Transcribe an audio file (and optionally structure it), shaped as the API response"""
+    voice_service = get_service(VoiceToTextService)
+    transcript_result = voice_service.transcribe_audio_file(
+        audio_file=audio_file,
+        language_code=language_code
+    )
+    
+    if not transcript_result['success']:
+        return {"success": False, "error": transcript_result['error']}
+    
+    payload = {
+        "success": True,
+        "transcript": transcript_result['transcript'],
+        "confidence": transcript_result['confidence']
+    }
+    
+    # Structure job posting if requested
+    if structure_posting:
+        structured_result = voice_service.structure_job_posting(
+            transcript_result['transcript']
+        )
+        
+        if structured_result['success']:
+            payload['structured_posting'] = structured_result['structured_posting']
+            payload['tokens_used'] = structured_result.get('tokens_used', 0)
+        else:
+            payload['error'] = "Could not structure job posting"
+    
+    return payload
+
+
+def id_card_ocr_payload(image_content, document_type, worker_id=None):
+    """Run ID card OCR and auto-fill the worker, shaped as the API response"""
+    from users.models import WorkerProfile
+    
+    ocr_service = get_service(OCRService)
+    result = ocr_service.extract_id_card_data(image_content)
+    
+    if not result['success']:
+        return {"success": False, "error": result['error']}
+    
+    payload = {
+        "success": True,
+        "document_type": document_type,
+        "extracted_data": result['extracted_data'],
+        "confidence": result['confidence'],
+        "full_text": result.get('full_text', '')
+    }
+    
+    # Link to worker if provided
+    if worker_id:
+        try:
+            worker = WorkerProfile.objects.get(id=worker_id)
+            
+            # Auto-fill worker data if confidence is high
+            if result['confidence'] > 80:
+                extracted = result['extracted_data']
+                changed = []
+                
+                if extracted.get('id_number'):
+                    worker.national_id = extracted['id_number']
+                    changed.append('national_id')
+                
+                if extracted.get('date_of_birth'):
+                    match = DOB_PATTERN.match(extracted['date_of_birth'])
+                    if match:
+                        day, month, year = map(int, match.groups())
+                        try:
+                            worker.date_of_birth = date(year, month, day)
+                            changed.append('date_of_birth')
+                        except ValueError:
+                            pass  # e.g. 31/02 from a misread digit
+                
+                # Only write the auto-filled columns
+                if changed:
+                    worker.save(update_fields=changed + ['updated_at'])
+                
+                payload['auto_filled'] = True
+                payload['worker_updated'] = {
+                    'id': str(worker.id),
+                    'name': worker.full_name
+                }
+                
+        except WorkerProfile.DoesNotExist:
+            pass
+    
+    return payload
+
+
+@shared_task
+def voice_to_text_task(file_name, language_code='en-UG', structure_posting=False):
+    """Transcribe an audio upload staged in storage by VoiceToTextView"""
+    from django.core.files.storage import default_storage
+    
+    try:
+        with default_storage.open(file_name, 'rb') as audio_file:
+            return voice_to_text_payload(audio_file, language_code, structure_posting)
+        
+    except Exception as e:
+        logger.error(f"Error transcribing staged audio {file_name}: {str(e)}")
+        return {"success": False, "error": str(e)}
+    finally:
+        default_storage.delete(file_name)
+
+
+@shared_task
+def id_card_ocr_task(file_name, document_type, worker_id=None):
+    """OCR an ID card upload staged in storage by OCRView"""
+    from django.core.files.storage import default_storage
+    
+    try:
+        with default_storage.open(file_name, 'rb') as f:
+            image_content = f.read()
+        
+        return id_card_ocr_payload(image_content, document_type, worker_id)
+        
+    except Exception as e:
+        logger.error(f"Error processing staged image {file_name}: {str(e)}")
+        return {"success": False, "error": str(e)}
+    finally:
+        default_storage.delete(file_name)
+
+
 @shared_task
 def analyze_review_sentiment(review_id):
     """Analyze review sentiment with AI"""
     from reviews.models import Review
-    from ai_services.services import SentimentAnalyzer
     
     try:
         review = Review.objects.get(id=review_id)
-        sentiment_analyzer = SentimentAnalyzer()
+        
+        # Nothing to analyze in blank, emoji-only or one-word comments
+        text = (review.comment or "").strip()
+        if len(text) < MIN_SENTIMENT_TEXT_LENGTH or not any(c.isalnum() for c in text):
+            return {
+                "success": True,
+                "review_id": str(review_id),
+                "sentiment": "neutral",
+                "is_suspicious": False,
+                "short_circuited": True
+            }
+        
+        sentiment_analyzer = get_service(SentimentAnalyzer)
         
         # Analyze sentiment
         analysis = sentiment_analyzer.analyze(
@@ -143,25 +285,27 @@ def analyze_review_sentiment(review_id):
             review.flagged_reason = "AI detected suspicious patterns"
             review.save()
             
-            # Notify admin
-            from notifications.tasks import send_notification_task
+            # Notify admins with a single broker message
+            from notifications.tasks import send_bulk_notifications
             from users.models import User
             
-            admins = User.objects.filter(role__in=['admin', 'super_admin'])
-            for admin in admins:
-                send_notification_task.delay(
-                    user_id=str(admin.id),
-                    notification_type='review',
-                    title='Suspicious Review Detected',
-                    message=f'AI detected a potentially fake review from {review.reviewer.get_full_name()}',
-                    action_url=f'/admin/reviews/{review.id}',
-                    action_text='Review',
-                    data={
-                        'review_id': str(review.id),
-                        'reviewer_id': str(review.reviewer.id),
-                        'confidence': analysis.get('confidence', 0)
-                    }
-                )
+            admin_ids = User.objects.filter(
+                role__in=['admin', 'super_admin']
+            ).values_list('id', flat=True)
+            
+            send_bulk_notifications.delay(
+                user_ids=[str(pk) for pk in admin_ids],
+                notification_type='review',
+                title='Suspicious Review Detected',
+                message=f'AI detected a potentially fake review from {review.reviewer.get_full_name()}',
+                action_url=f'/admin/reviews/{review.id}',
+                action_text='Review',
+                data={
+                    'review_id': str(review.id),
+                    'reviewer_id': str(review.reviewer.id),
+                    'confidence': analysis.get('confidence', 0)
+                }
+            )
         
         return {
             "success": True,
@@ -181,7 +325,7 @@ def analyze_review_sentiment(review_id):
 @shared_task
 def generate_interview_questions_batch(job_category, experience_level, count=10):
     """Generate interview questions in batch"""
-    interview_service = InterviewQuestionService()
+    interview_service = get_service(InterviewQuestionService)
     
     result = interview_service.generate_questions(
         job_category=job_category,
@@ -198,38 +342,92 @@ def generate_interview_questions_batch(job_category, experience_level, count=10)
     }
 
 
+@shared_task
+def generate_interview_questions_bulk(requests):
+    """
+    Generate interview questions for many job profiles concurrently.
+    
+    Each item in `requests` is a dict of job_category, experience_level and
+    optional specific_skills.
+    """
+    interview_service = get_service(InterviewQuestionService)
+    results = interview_service.generate_questions_many(requests)
+    
+    return {
+        "total": len(requests),
+        "succeeded": sum(1 for r in results if r.get('success')),
+        "tokens_used": sum(r.get('tokens_used', 0) for r in results),
+        "results": results
+    }
+
+
 @shared_task
 def batch_process_documents_with_ocr(document_ids):
-    """Batch process documents with OCR"""
-    from documents.models import
-from documents.models import WorkerDocument
+    """
+    Batch process documents with OCR
+    
+    Documents are split into chunks of one Vision batch request each and
+    processed in parallel; merge_ocr_chunk_results aggregates the chunks.
+    """
+    from ai_services.services import OCR_BATCH_SIZE
+    
+    header = [
+        ocr_document_chunk.s(document_ids[start:start + OCR_BATCH_SIZE])
+        for start in range(0, len(document_ids), OCR_BATCH_SIZE)
+    ]
+    result = chord(header)(merge_ocr_chunk_results.s())
+    
+    return {
+        "total": len(document_ids),
+        "chunks": len(header),
+        "chord_id": result.id
+    }
+
+
+@shared_task
+def merge_ocr_chunk_results(chunk_results):
+    """Combine per-chunk OCR results into a single batch summary"""
+    results = [r for chunk in chunk_results for r in chunk['results']]
+    
+    return {
+        "total": len(results),
+        "processed": sum(1 for r in results if r['success']),
+        "failed": sum(1 for r in results if not r['success']),
+        "results": results
+    }
+
+
+@shared_task(acks_late=True)
+def ocr_document_chunk(document_ids):
+    """OCR one chunk of documents with a single Vision batch request"""
+    from documents.models import WorkerDocument
     from ai_services.services import OCRService
     
-    ocr_service = OCRService()
+    ocr_service = get_service(OCRService)
     results = []
+    documents = []
+    image_contents = []
+    
+    documents_by_id = {
+        str(d.id): d
+        for d in WorkerDocument.objects.filter(id__in=document_ids).select_related('worker')
+    }
     
     for doc_id in document_ids:
-        try:
-            document = WorkerDocument.objects.get(id=doc_id)
-            
-            # Process with OCR
-            ocr_result = ocr_service.extract_data(document)
-            
-            document.ai_ocr_result = ocr_result
-            document.save()
-            
-            results.append({
-                "document_id": str(doc_id),
-                "success": True,
-                "confidence": ocr_result.get('confidence', 0)
-            })
-            
-        except WorkerDocument.DoesNotExist:
+        document = documents_by_id.get(str(doc_id))
+        if document is None:
             results.append({
                 "document_id": str(doc_id),
                 "success": False,
                 "error": "Document not found"
             })
+            continue
+        
+        try:
+            with document.document_file.open('rb') as f:
+                image_contents.append(f.read())
+            documents.append(document)
+            
         except Exception as e:
             results.append({
                 "document_id": str(doc_id),
@@ -237,6 +435,25 @@ from documents.models import WorkerDocument
                 "error": str(e)
             })
     
+    # Process with OCR, several images per Vision request
+    ocr_results = ocr_service.extract_id_card_data_batch(image_contents)
+    
+    for document, ocr_result in zip(documents, ocr_results):
+        document.ai_ocr_result = ocr_result
+        document.ai_confidence_score = ocr_result.get('confidence')
+        document.ai_extracted_data = ocr_result.get('extracted_data')
+        results.append({
+            "document_id": str(document.id),
+            "success": ocr_result['success'],
+            "confidence": ocr_result.get('confidence', 0)
+        })
+    
+    WorkerDocument.objects.bulk_update(
+        documents,
+        ['ai_ocr_result', 'ai_confidence_score', 'ai_extracted_data'],
+        batch_size=200
+    )
+    
     return {
         "total": len(document_ids),
         "processed": sum(1 for r in results if r['success']),
@@ -245,11 +462,23 @@ from documents.models import WorkerDocument
     }
 
 
+@shared_task
+def index_chatbot_question(context, digest, normalized_message):
+    """Embed an answered chatbot question and add it to the semantic index"""
+    from ai_services import semantic_index
+    
+    embedding = get_service(ChatbotService)._get_embedding(normalized_message)
+    if embedding is None:
+        return {"success": False, "error": "Embedding unavailable"}
+    
+    semantic_index.add(context, digest, embedding)
+    return {"success": True}
+
+
 @shared_task
 def cleanup_ai_cache():
     """Clean up AI cache and temporary files"""
     import os
-    import shutil
     from django.conf import settings
     
     cache_dir = os.path.join(settings.MEDIA_ROOT, 'ai_cache')
@@ -259,12 +488,13 @@ def cleanup_ai_cache():
         import time
         now = time.time()
         
-        for filename in os.listdir(cache_dir):
-            filepath = os.path.join(cache_dir, filename)
-            if os.path.isfile(filepath):
-                file_age = now - os.path.getmtime(filepath)
-                if file_age > 7 * 24 * 3600:  # 7 days in seconds
-                    os.remove(filepath)
+        # scandir entries carry the file type, so only the age check needs a stat()
+        with os.scandir(cache_dir) as entries:
+            for entry in entries:
+                if entry.is_file(follow_symlinks=False):
+                    file_age = now - entry.stat(follow_symlinks=False).st_mtime
+                    if file_age > 7 * 24 * 3600:  # 7 days in seconds
+                        os.unlink(entry.path)
         
         logger.info("AI cache cleaned up")
     
@@ -1 +1,114 @@
+# ai_services/tests.py
+import tempfile
+import uuid
+from unittest import mock
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from ai_services.tasks import (
+    batch_process_documents_with_ocr, merge_ocr_chunk_results, ocr_document_chunk
+)
+from documents.models import WorkerDocument
+from users.models import User, WorkerProfile
+from users.tasks import send_welcome_email
 
+
+class BatchOCRTests(TestCase):
+    """Batch OCR chord: fan-out, per-chunk OCR and the merged summary"""
+    
+    @classmethod
+    def setUpTestData(cls):
+        with mock.patch.object(send_welcome_email, 'delay'):
+            user = User.objects.create_user(
+                'worker@example.com', '+256700000002', 'test-pass-123',
+                role='worker', first_name='Test', last_name='Worker'
+            )
+        cls.worker = WorkerProfile.objects.create(user=user, first_name='Test', last_name='Worker')
+    
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        media_settings = self.settings(MEDIA_ROOT=media.name)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+        
+        self.ocr_service = mock.Mock()
+        patcher = mock.patch('ai_services.tasks.get_service', return_value=self.ocr_service)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+    
+    def create_document(self, document_type, content=None):
+        return WorkerDocument.objects.create(
+            worker=self.worker,
+            document_type=document_type,
+            document_file=(
+                SimpleUploadedFile(f'{document_type}.jpg', content) if content
+                # Stored name only, the file itself is missing
+                else f'worker_documents/{document_type}.jpg'
+            )
+        )
+    
+    def test_chunk_writes_results_with_one_bulk_update(self):
+        national_id = self.create_document('national_id', b'national-id-image')
+        passport = self.create_document('passport', b'passport-image')
+        unreadable = self.create_document('other')
+        missing_id = str(uuid.uuid4())
+        passed = {'success': True, 'confidence': 0.92, 'extracted_data': {'surname': 'OKELLO'}}
+        failed = {'success': False, 'error': 'No text found'}
+        self.ocr_service.extract_id_card_data_batch.return_value = [passed, failed]
+        
+        # One query for the documents, one UPDATE for all the results
+        with self.assertNumQueries(2):
+            result = ocr_document_chunk(
+                [str(national_id.id), missing_id, str(unreadable.id), str(passport.id)]
+            )
+        
+        self.ocr_service.extract_id_card_data_batch.assert_called_once_with(
+            [b'national-id-image', b'passport-image']
+        )
+        self.assertEqual((result['total'], result['processed'], result['failed']), (4, 1, 3))
+        outcomes = {r['document_id']: r['success'] for r in result['results']}
+        self.assertEqual(outcomes, {
+            str(national_id.id): True,
+            missing_id: False,
+            str(unreadable.id): False,
+            str(passport.id): False,
+        })
+        
+        national_id.refresh_from_db()
+        self.assertEqual(national_id.ai_ocr_result, passed)
+        self.assertEqual(national_id.ai_confidence_score, 0.92)
+        self.assertEqual(national_id.ai_extracted_data, {'surname': 'OKELLO'})
+        
+        passport.refresh_from_db()
+        self.assertEqual(passport.ai_ocr_result, failed)
+        self.assertIsNone(passport.ai_confidence_score)
+        
+        unreadable.refresh_from_db()
+        self.assertIsNone(unreadable.ai_ocr_result)
+    
+    def test_merge_sums_the_chunks(self):
+        summary = merge_ocr_chunk_results([
+            {'results': [{'document_id': 'a', 'success': True}]},
+            {'results': [{'document_id': 'b', 'success': False}, {'document_id': 'c', 'success': True}]},
+        ])
+        
+        self.assertEqual((summary['total'], summary['processed'], summary['failed']), (3, 2, 1))
+        self.assertEqual([r['document_id'] for r in summary['results']], ['a', 'b', 'c'])
+    
+    @mock.patch('ai_services.services.OCR_BATCH_SIZE', 2)
+    @mock.patch('ai_services.tasks.chord')
+    def test_batch_fans_out_one_task_per_chunk(self, chord):
+        chord.return_value.return_value.id = 'chord-id'
+        document_ids = [str(uuid.uuid4()) for _ in range(5)]
+        
+        result = batch_process_documents_with_ocr(document_ids)
+        
+        header, = chord.call_args.args
+        self.assertEqual(
+            [signature.args for signature in header],
+            [(document_ids[0:2],), (document_ids[2:4],), (document_ids[4:],)]
+        )
+        callback, = chord.return_value.call_args.args
+        self.assertEqual(callback.task, merge_ocr_chunk_results.name)
+        self.assertEqual(result, {"total": 5, "chunks": 3, "chord_id": 'chord-id'})
+        self.ocr_service.extract_id_card_data_batch.assert_not_called()
@@ -1,6 +1,6 @@
 # ai/urls.py
 from django.urls import path
-from ai import views
+from ai_services import views
 
 urlpatterns = [
     path('chatbot/', views.ChatbotView.as_view(), name='ai-chatbot'),
@@ -9,4 +9,5 @@ urlpatterns = [
     path('interview-questions/', views.InterviewQuestionsView.as_view(), name='interview-questions'),
     path('sentiment-analysis/', views.SentimentAnalysisView.as_view(), name='sentiment-analysis'),
     path('salary-recommendation/', views.SalaryRecommendationView.as_view(), name='salary-recommendation'),
+    path('jobs/<uuid:job_id>/', views.AIJobStatusView.as_view(), name='ai-job-status'),
 ]
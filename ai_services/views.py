@@ -2,22 +2,66 @@
 from rest_framework import views, status, permissions
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser
+from rest_framework.renderers import BrowsableAPIRenderer
+from django.http import StreamingHttpResponse
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from celery.result import AsyncResult
+from types import MappingProxyType
 import json
+import uuid
+import orjson
 
-from ai.serializers import (
+from workconnect.renderers import ORJSONRenderer
+from ai_services.serializers import (
     ChatbotRequestSerializer, VoiceToTextSerializer,
     OCRRequestSerializer, InterviewQuestionsSerializer,
     SentimentAnalysisSerializer, SalaryRecommendationSerializer
 )
-from ai.services import (
-    ChatbotService, VoiceToTextService, OCRService,
-    InterviewQuestionService
+from ai_services.services import (
+    ChatbotService, ConversationStore, InterviewQuestionService,
+    SentimentAnalyzer, CHATBOT_FALLBACK_RESPONSE, get_service
+)
+from ai_services.tasks import (
+    voice_to_text_payload, id_card_ocr_payload,
+    voice_to_text_task, id_card_ocr_task
 )
 from users.permissions import IsEmployer, IsWorker, IsAdmin
 
+# Salary ranges (UGX) used when there is no contract history for a category
+SALARY_DEFAULTS = MappingProxyType({
+    'nanny': MappingProxyType({'min': 300000, 'avg': 400000, 'max': 600000}),
+    'housekeeper': MappingProxyType({'min': 250000, 'avg': 350000, 'max': 500000}),
+    'gardener': MappingProxyType({'min': 200000, 'avg': 300000, 'max': 450000}),
+    'driver': MappingProxyType({'min': 400000, 'avg': 500000, 'max': 800000}),
+    'cook': MappingProxyType({'min': 350000, 'avg': 450000, 'max': 700000}),
+})
+SALARY_DEFAULT_FALLBACK = MappingProxyType({'min': 250000, 'avg': 350000, 'max': 500000})
+
+AI_JOB_OWNER_TTL = 86400  # matches Celery's default result expiry
+
+
+def enqueue_upload_job(request, uploaded_file, task, *args):
+    """
+    Stage an upload in storage and process it with a background task
+    
+    Returns a 202 response with the job id to poll at AIJobStatusView.
+    """
+    file_name = default_storage.save(
+        f"ai_uploads/{uuid.uuid4().hex}_{uploaded_file.name}", uploaded_file
+    )
+    job = task.delay(file_name, *args)
+    cache.set(f"ai_job_owner_{job.id}", str(request.user.id), timeout=AI_JOB_OWNER_TTL)
+    
+    return Response(
+        {"job_id": job.id, "status": job.state},
+        status=status.HTTP_202_ACCEPTED
+    )
+
 
 class ChatbotView(views.APIView):
     """AI Chatbot endpoint"""
+    renderer_classes = [ORJSONRenderer, BrowsableAPIRenderer]
     permission_classes = [permissions.IsAuthenticated]
     
     def post(self, request):
@@ -27,28 +71,65 @@ class ChatbotView(views.APIView):
         
         data = serializer.validated_data
         
-        chatbot_service = ChatbotService()
+        chatbot_service = get_service(ChatbotService)
+        
+        # History is kept server-side; a client-sent history only seeds a
+        # conversation the server doesn't know (yet)
+        store = ConversationStore(request.user.id)
+        history = store.get() or data.get('conversation_history', [])
+        
+        if data.get('stream'):
+            return self._stream(chatbot_service, store, history, data)
+        
         result = chatbot_service.get_response(
             user_message=data['message'],
-            conversation_history=data.get('conversation_history', []),
+            conversation_history=history,
             context=data.get('context', '')
         )
         
         if result['success']:
-            return Response({
+            store.save_turn(history, data['message'], result['response'])
+            
+            response = Response({
                 "response": result['response'],
                 "conversation_id": str(request.user.id),  # Using user ID for conversation tracking
-                "tokens_used": result.get('tokens_used', 0)
+                "tokens_used": result.get('tokens_used', 0),
+                "cached": result.get('cached', False)
             })
+            response['X-Cache'] = 'HIT' if result.get('cached') else 'MISS'
+            return response
         else:
             return Response(
                 {"error": result.get('error', 'Chatbot service unavailable')},
                 status=status.HTTP_503_SERVICE_UNAVAILABLE
             )
+    
+    def _stream(self, chatbot_service, store, history, data):
+        """Send the answer as Server-Sent Events while it is generated"""
+        def events():
+            parts = []
+            for delta in chatbot_service.stream_response(
+                user_message=data['message'],
+                conversation_history=history,
+                context=data.get('context', '')
+            ):
+                parts.append(delta)
+                yield b"data: " + orjson.dumps({"delta": delta}) + b"\n\n"
+            yield b"data: [DONE]\n\n"
+            
+            answer = "".join(parts)
+            if answer and answer != CHATBOT_FALLBACK_RESPONSE:
+                store.save_turn(history, data['message'], answer)
+        
+        response = StreamingHttpResponse(events(), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'  # Stop nginx from buffering the stream
+        return response
 
 
 class VoiceToTextView(views.APIView):
     """Voice-to-text conversion endpoint"""
+    renderer_classes = [ORJSONRenderer, BrowsableAPIRenderer]
     permission_classes = [permissions.IsAuthenticated, IsEmployer]
     parser_classes = [MultiPartParser, FormParser]
     
@@ -59,51 +140,33 @@ class VoiceToTextView(views.APIView):
         
         data = serializer.validated_data
         
-        # Read audio file
         audio_file = data['audio_file']
-        audio_content = audio_file.read()
         
-        # Transcribe audio
-        voice_service = VoiceToTextService()
-        transcript_result = voice_service.transcribe_audio(
-            audio_content=audio_content,
-            language_code=data['language']
+        if data.get('run_async'):
+            return enqueue_upload_job(
+                request, audio_file, voice_to_text_task,
+                data['language'], bool(data.get('job_category'))
+            )
+        
+        # Transcribe audio straight from the upload (temp file or memory)
+        result = voice_to_text_payload(
+            audio_file=audio_file,
+            language_code=data['language'],
+            structure_posting=bool(data.get('job_category'))
         )
         
-        if not transcript_result['success']:
+        if not result.pop('success'):
             return Response(
-                {"error": transcript_result['error']},
+                {"error": result['error']},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Structure job posting if requested
-        if data.get('job_category'):
-            structured_result = voice_service.structure_job_posting(
-                transcript_result['transcript']
-            )
-            
-            if structured_result['success']:
-                return Response({
-                    "transcript": transcript_result['transcript'],
-                    "structured_posting": structured_result['structured_posting'],
-                    "confidence": transcript_result['confidence'],
-                    "tokens_used": structured_result.get('tokens_used', 0)
-                })
-            else:
-                return Response({
-                    "transcript": transcript_result['transcript'],
-                    "error": "Could not structure job posting",
-                    "confidence": transcript_result['confidence']
-                })
-        
-        return Response({
-            "transcript": transcript_result['transcript'],
-            "confidence": transcript_result['confidence']
-        })
+        return Response(result)
 
 
 class OCRView(views.APIView):
     """OCR for document verification endpoint"""
+    renderer_classes = [ORJSONRenderer, BrowsableAPIRenderer]
     permission_classes = [permissions.IsAuthenticated, IsAdmin]
     parser_classes = [MultiPartParser, FormParser]
     
@@ -114,65 +177,34 @@ class OCRView(views.APIView):
         
         data = serializer.validated_data
         
-        # Read image file
         image_file = data['image_file']
-        image_content = image_file.read()
+        worker_id = str(data['worker_id']) if data.get('worker_id') else None
+        
+        if data.get('run_async'):
+            return enqueue_upload_job(
+                request, image_file, id_card_ocr_task,
+                data['document_type'], worker_id
+            )
         
         # Extract data using OCR
-        ocr_service = OCRService()
-        result = ocr_service.extract_id_card_data(image_content)
+        result = id_card_ocr_payload(
+            image_content=image_file.read(),
+            document_type=data['document_type'],
+            worker_id=worker_id
+        )
         
-        if not result['success']:
+        if not result.pop('success'):
             return Response(
                 {"error": result['error']},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        response_data = {
-            "document_type": data['document_type'],
-            "extracted_data": result['extracted_data'],
-            "confidence": result['confidence'],
-            "full_text": result.get('full_text', '')
-        }
-        
-        # Link to worker if provided
-        if data.get('worker_id'):
-            from users.models import WorkerProfile
-            try:
-                worker = WorkerProfile.objects.get(id=data['worker_id'])
-                
-                # Auto-fill worker data if confidence is high
-                if result['confidence'] > 80:
-                    extracted = result['extracted_data']
-                    
-                    if extracted.get('id_number'):
-                        worker.national_id = extracted['id_number']
-                    
-                    if extracted.get('date_of_birth'):
-                        # Parse date format
-                        from datetime import datetime
-                        try:
-                            dob = datetime.strptime(extracted['date_of_birth'], '%d/%m/%Y')
-                            worker.date_of_birth = dob.date()
-                        except:
-                            pass
-                    
-                    worker.save()
-                    
-                    response_data['auto_filled'] = True
-                    response_data['worker_updated'] = {
-                        'id': str(worker.id),
-                        'name': worker.full_name
-                    }
-                    
-            except WorkerProfile.DoesNotExist:
-                pass
-        
-        return Response(response_data)
+        return Response(result)
 
 
 class InterviewQuestionsView(views.APIView):
     """AI interview questions generator endpoint"""
+    renderer_classes = [ORJSONRenderer, BrowsableAPIRenderer]
     permission_classes = [permissions.IsAuthenticated, IsEmployer]
     
     def post(self, request):
@@ -182,11 +214,12 @@ class InterviewQuestionsView(views.APIView):
         
         data = serializer.validated_data
         
-        interview_service = InterviewQuestionService()
+        interview_service = get_service(InterviewQuestionService)
         result = interview_service.generate_questions(
             job_category=data['job_category'],
             experience_level=data['experience_level'],
-            specific_skills=data.get('specific_skills', [])
+            specific_skills=data.get('specific_skills', []),
+            count=data['number_of_questions']
         )
         
         if result['success']:
@@ -204,6 +237,7 @@ class InterviewQuestionsView(views.APIView):
 
 class SentimentAnalysisView(views.APIView):
     """Sentiment analysis endpoint"""
+    renderer_classes = [ORJSONRenderer, BrowsableAPIRenderer]
     permission_classes = [permissions.IsAuthenticated]
     
     def post(self, request):
@@ -214,60 +248,18 @@ class SentimentAnalysisView(views.APIView):
         data = serializer.validated_data
         
         # Simple sentiment analysis (can be enhanced with AI)
-        text = data['text']
-        
-        # Basic sentiment analysis
-        positive_words = ['good', 'great', 'excellent', 'amazing', 'wonderful',
-                         'happy', 'pleased', 'satisfied', 'professional', 'reliable']
-        negative_words = ['bad', 'terrible', 'awful', 'poor', 'disappointed',
-                         'unhappy', 'late', 'rude', 'unprofessional']
-        
-        positive_count = sum(1 for word in positive_words if word in text.lower())
-        negative_count = sum(1 for word in negative_words if word in text.lower())
-        
-        sentiment = "neutral"
-        if positive_count > negative_count:
-            sentiment = "positive"
-        elif negative_count > positive_count:
-            sentiment = "negative"
-        
-        # Fake review detection (simple rules)
-        is_suspicious = False
-        red_flags = {}
-        
-        if data.get('analyze_fake_review'):
-            red_flags = {
-                'too_short': len(text.split()) < 10,
-                'all_caps': text.isupper(),
-                'excessive_punctuation': text.count('!') > 3 or text.count('?') > 3,
-                'generic_phrases': any(phrase in text.lower() for phrase in [
-                    'best ever', 'amazing', 'perfect in every way',
-                    'worst ever', 'terrible experience'
-                ]),
-                'no_specifics': len([w for w in text.split() if len(w) > 5]) < 3
-            }
-            
-            is_suspicious = sum(red_flags.values()) >= 2
-        
-        return Response({
-            "sentiment": sentiment,
-            "confidence": min(100, max(0, abs(positive_count - negative_count) * 20)),
-            "analysis": {
-                "positive_words_found": positive_count,
-                "negative_words_found": negative_count,
-                "word_count": len(text.split()),
-                "character_count": len(text)
-            },
-            "fake_review_detection": {
-                "is_suspicious": is_suspicious,
-                "red_flags": red_flags,
-                "recommendation": "Flag for review" if is_suspicious else "Looks genuine"
-            }
-        })
+        sentiment_analyzer = get_service(SentimentAnalyzer)
+        analysis = sentiment_analyzer.analyze(
+            text=data['text'],
+            analyze_fake_review=data.get('analyze_fake_review', False)
+        )
+        
+        return Response(analysis)
 
 
 class SalaryRecommendationView(views.APIView):
     """Salary recommendation endpoint"""
+    renderer_classes = [ORJSONRenderer, BrowsableAPIRenderer]
     permission_classes = [permissions.IsAuthenticated]
     
     def post(self, request):
@@ -291,17 +283,17 @@ class SalaryRecommendationView(views.APIView):
                 work_location__icontains=data['location']
             )
         
-        if similar_contracts.exists():
-            # Calculate statistics
-            from django.db.models import Avg, Min, Max
-            
-            stats = similar_contracts.aggregate(
-                avg_salary=Avg('worker_salary_amount'),
-                min_salary=Min('worker_salary_amount'),
-                max_salary=Max('worker_salary_amount'),
-                count=Count('id')
-            )
-            
+        # Calculate statistics; an empty match set comes back with count=0
+        from django.db.models import Avg, Min, Max, Count
+        
+        stats = similar_contracts.aggregate(
+            avg_salary=Avg('worker_salary_amount'),
+            min_salary=Min('worker_salary_amount'),
+            max_salary=Max('worker_salary_amount'),
+            count=Count('id')
+        )
+        
+        if stats['count']:
             # Adjust based on experience
             base_salary = stats['avg_salary'] or 300000
             experience_multiplier = min(2.0, 1.0 + (data['experience_years'] * 0.1))
@@ -333,23 +325,39 @@ class SalaryRecommendationView(views.APIView):
         
         else:
             # Default recommendations based on category
-            category_defaults = {
-                'nanny': {'min': 300000, 'avg': 400000, 'max': 600000},
-                'housekeeper': {'min': 250000, 'avg': 350000, 'max': 500000},
-                'gardener': {'min': 200000, 'avg': 300000, 'max': 450000},
-                'driver': {'min': 400000, 'avg': 500000, 'max': 800000},
-                'cook': {'min': 350000, 'avg': 450000, 'max': 700000}
-            }
-            
-            defaults = category_defaults.get(
-                data['job_category'].lower(),
-                {'min': 250000, 'avg': 350000, 'max': 500000}
+            defaults = SALARY_DEFAULTS.get(
+                data['job_category'].casefold(),
+                SALARY_DEFAULT_FALLBACK
             )
             
             return Response({
-                "recommendation": defaults,
+                "recommendation": dict(defaults),
                 "market_data": {
                     "sample_size": 0,
                     "note": "Insufficient historical data, using category defaults"
                 }
             })
+
+
+class AIJobStatusView(views.APIView):
+    """Poll a background OCR or voice-to-text job"""
+    renderer_classes = [ORJSONRenderer, BrowsableAPIRenderer]
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get(self, request, job_id):
+        # Only the user who submitted the job may read its result
+        if cache.get(f"ai_job_owner_{job_id}") != str(request.user.id):
+            return Response(
+                {"error": "Job not found"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
+        job = AsyncResult(str(job_id))
+        response_data = {"job_id": str(job_id), "status": job.state}
+        
+        if job.successful():
+            response_data['result'] = job.result
+        elif job.failed():
+            response_data['error'] = str(job.result)
+        
+        return Response(response_data)
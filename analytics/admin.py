@@ -38,17 +38,21 @@ class PlatformMetricAdmin(admin.ModelAdmin):
     actions = ['recalculate_metrics']
     
     def recalculate_metrics(self, request, queryset):
-        """Recalculate metrics for selected dates"""
-        for metric in queryset:
-            new_metric = PlatformMetric.calculate_daily_metrics(metric.metric_date)
+        """Queue recalculation of metrics for selected dates"""
+        from analytics.tasks import calculate_daily_metrics_task
         
-        self.message_user(request, f"{queryset.count()} metrics recalculated.")
+        metric_dates = list(queryset.values_list('metric_date', flat=True))
+        for metric_date in metric_dates:
+            calculate_daily_metrics_task.delay(metric_date.isoformat(), recalculate=True)
+        
+        self.message_user(request, f"{len(metric_dates)} metrics queued for recalculation.")
     recalculate_metrics.short_description = "Recalculate selected metrics"
 
 
 @admin.register(UserActivityLog)
 class UserActivityLogAdmin(admin.ModelAdmin):
     list_display = ('user', 'action_type', 'entity_type', 'created_at')
+    list_select_related = ('user',)
     list_filter = ('action_type', 'entity_type', 'created_at')
     search_fields = ('user__email', 'user__first_name', 'user__last_name')
     readonly_fields = ('created_at',)
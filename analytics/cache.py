@@ -0,0 +1,29 @@
+# analytics/cache.py
+"""
+Cache keys for analytics endpoints
+
+Keys embed a generation number that is bumped whenever a PlatformMetric
+row is saved, which invalidates every cached metrics response at once
+without needing pattern deletes.
+"""
+import time
+from django.core.cache import cache
+
+GENERATION_KEY = 'platmetric:generation'
+
+
+def metrics_cache_key(*parts):
+    generation = cache.get_or_set(GENERATION_KEY, _new_generation, timeout=None)
+    return f"platmetric:{generation}:" + ":".join(str(part) for part in parts)
+
+
+def invalidate_metrics_cache():
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        # Generation key was evicted; start from a value no old key can use
+        cache.set(GENERATION_KEY, _new_generation(), timeout=None)
+
+
+def _new_generation():
+    return time.time_ns()
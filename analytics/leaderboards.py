@@ -0,0 +1,69 @@
+# analytics/leaderboards.py
+"""
+Top worker and employer rankings for the analytics dashboard
+
+Both rankings aggregate over every review or contract on the platform,
+so they are computed by the nightly refresh_leaderboards task and read
+from the cache. A cache miss falls back to computing them inline.
+"""
+from django.core.cache import cache
+from django.db.models import Avg, Count, Sum, Value
+from django.db.models.functions import Concat, Trim
+
+LEADERBOARDS_KEY = 'analytics:leaderboards'
+# Outlives one nightly refresh so a late run never leaves the key empty
+LEADERBOARDS_TTL = 60 * 60 * 26
+LEADERBOARD_SIZE = 10
+
+
+def full_name():
+    return Trim(Concat('first_name', Value(' '), 'last_name'))
+
+
+def top_workers():
+    from users.models import User
+    
+    workers = User.objects.filter(
+        role='worker',
+        reviews_received__is_verified=True
+    ).annotate(
+        avg_rating=Avg('reviews_received__rating'),
+        review_count=Count('reviews_received')
+    ).filter(
+        review_count__gte=3
+    ).order_by('-avg_rating').values(
+        'id', 'avg_rating', 'review_count', name=full_name()
+    )[:LEADERBOARD_SIZE]
+    
+    return [{**user, "id": str(user['id'])} for user in workers]
+
+
+def top_employers():
+    from users.models import User
+    
+    employers = User.objects.filter(
+        role='employer'
+    ).annotate(
+        contracts_count=Count('employer_profile__contracts'),
+        total_spent=Sum('employer_profile__contracts__total_monthly_cost', default=0)
+    ).filter(
+        contracts_count__gte=1
+    ).order_by('-total_spent').values(
+        'id', 'contracts_count', 'total_spent', name=full_name()
+    )[:LEADERBOARD_SIZE]
+    
+    return [{**user, "id": str(user['id'])} for user in employers]
+
+
+def refresh():
+    """Recompute both rankings and store them"""
+    leaderboards = {
+        "top_workers": top_workers(),
+        "top_employers": top_employers()
+    }
+    cache.set(LEADERBOARDS_KEY, leaderboards, timeout=LEADERBOARDS_TTL)
+    return leaderboards
+
+
+def get():
+    return cache.get(LEADERBOARDS_KEY) or refresh()
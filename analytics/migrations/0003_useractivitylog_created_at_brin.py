@@ -0,0 +1,38 @@
+# Generated by Django 5.2.10 on 2026-10-16 12:00
+
+from django.db import migrations
+
+
+def use_brin_for_created_at(apps, schema_editor):
+    # BRIN is Postgres-only; other backends keep the B-tree index
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    
+    schema_editor.execute('DROP INDEX IF EXISTS analytics_u_created_890de2_idx')
+    schema_editor.execute(
+        'CREATE INDEX analytics_u_created_890de2_idx '
+        'ON analytics_useractivitylog USING brin (created_at) '
+        'WITH (pages_per_range = 32)'
+    )
+
+
+def use_btree_for_created_at(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    
+    schema_editor.execute('DROP INDEX IF EXISTS analytics_u_created_890de2_idx')
+    schema_editor.execute(
+        'CREATE INDEX analytics_u_created_890de2_idx '
+        'ON analytics_useractivitylog (created_at)'
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(use_brin_for_created_at, use_btree_for_created_at),
+    ]
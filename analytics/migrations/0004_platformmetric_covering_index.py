@@ -0,0 +1,21 @@
+# Generated by Django 5.2.10 on 2026-10-16 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0003_useractivitylog_created_at_brin'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='platformmetric',
+            name='analytics_p_metric__c0d66f_idx',
+        ),
+        migrations.AddIndex(
+            model_name='platformmetric',
+            index=models.Index(fields=['metric_date'], include=('total_revenue', 'new_registrations', 'new_contracts'), name='platform_metric_date_cov_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.10 on 2026-10-16 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0004_platformmetric_covering_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='useractivitylog',
+            index=models.Index(fields=['user', 'action_type', 'created_at'], name='analytics_u_user_id_811be3_idx'),
+        ),
+    ]
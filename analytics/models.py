@@ -2,7 +2,9 @@
 import uuid
 from django.db import models
 from django.utils import timezone
+from datetime import datetime, time, timedelta
 from django.db.models import Sum, Count, Avg
+from django.db.models.functions import TruncDate
 from users.models import User
 from contracts.models import Contract
 from payments.models import PayrollCycle
@@ -49,79 +51,245 @@ class PlatformMetric(models.Model):
     class Meta:
         ordering = ['-metric_date']
         indexes = [
-            models.Index(fields=['metric_date']),
+            # Covers the revenue/summary reads (Postgres; plain index elsewhere)
+            models.Index(
+                fields=['metric_date'],
+                name='platform_metric_date_cov_idx',
+                include=['total_revenue', 'new_registrations', 'new_contracts']
+            ),
         ]
     
     def __str__(self):
         return f"Metrics for {self.metric_date}"
     
     @classmethod
-    def calculate_daily_metrics(cls, date=None):
-        """Calculate and save daily metrics"""
+    def calculate_metrics_bulk(cls, dates):
+        """
+        Metrics for several dates, keyed by date
+        
+        Stored rows are fetched in one query. For the dates without a row,
+        each source table is read once over their whole span, grouped by
+        day, and the new rows are written with a single bulk insert.
+        """
+        from payments.models import PaymentTransaction
+        from job_postings.models import JobPosting, JobApplication
+        from messaging.models import Message
+        from analytics.cache import invalidate_metrics_cache
+        
+        metrics = cls.objects.filter(metric_date__in=dates).in_bulk(field_name='metric_date')
+        missing = sorted(set(dates) - metrics.keys())
+        if not missing:
+            return metrics
+        
+        span_start = timezone.make_aware(datetime.combine(missing[0], time.min))
+        span_end = timezone.make_aware(
+            datetime.combine(missing[-1] + timedelta(days=1), time.min)
+        )
+        
+        def per_day(queryset, field, **aggregates):
+            # TruncDate uses the current time zone, matching the day bounds
+            # of calculate_daily_metrics
+            rows = queryset.filter(**{
+                f'{field}__gte': span_start,
+                f'{field}__lt': span_end
+            }).annotate(day=TruncDate(field)).order_by().values('day').annotate(**aggregates)
+            return {row.pop('day'): row for row in rows}
+        
+        # Point-in-time counts are the same for every date being filled
+        current = User.objects.aggregate(
+            total_users=Count('id', filter=models.Q(is_active=True)),
+            active_employers=Count('employer_profile', filter=models.Q(is_active=True)),
+            active_workers=Count(
+                'worker_profile',
+                filter=models.Q(is_active=True, worker_profile__availability='available')
+            ),
+        )
+        current['active_contracts'] = Contract.objects.filter(status='active').count()
+        
+        daily = [
+            per_day(
+                User.objects.all(), 'created_at',
+                new_registrations=Count('id'),
+                new_employers=Count('id', filter=models.Q(role='employer')),
+                new_workers=Count('id', filter=models.Q(role='worker')),
+            ),
+            per_day(Contract.objects.all(), 'created_at', new_contracts=Count('id')),
+            per_day(
+                Contract.objects.filter(status='completed'), 'completed_at',
+                completed_contracts=Count('id')
+            ),
+            per_day(
+                PaymentTransaction.objects.filter(
+                    status='successful',
+                    transaction_type__in=['service_fee', 'worker_disbursement']
+                ), 'completed_at',
+                service_fees_collected=Sum(
+                    'amount', filter=models.Q(transaction_type='service_fee'), default=0
+                ),
+                worker_salaries_disbursed=Sum(
+                    'amount', filter=models.Q(transaction_type='worker_disbursement'), default=0
+                ),
+            ),
+            per_day(JobPosting.objects.all(), 'created_at', total_job_postings=Count('id')),
+            per_day(JobApplication.objects.all(), 'applied_at', total_applications=Count('id')),
+            per_day(
+                Message.objects.filter(is_system_message=False), 'created_at',
+                total_messages=Count('id')
+            ),
+        ]
+        trials = {
+            row.pop('trial_end_date'): row
+            for row in Contract.objects.filter(
+                trial_end_date__in=missing
+            ).order_by().values('trial_end_date').annotate(
+                trials_ended=Count('id'),
+                successful_trials=Count('id', filter=models.Q(trial_passed=True))
+            )
+        }
+        
+        new_metrics = []
+        for date in missing:
+            day_metrics = cls(metric_date=date, **current)
+            for rows in daily:
+                for field, value in rows.get(date, {}).items():
+                    setattr(day_metrics, field, value)
+            day_metrics.total_revenue = day_metrics.service_fees_collected
+            
+            day_trials = trials.get(date, {})
+            day_metrics.set_conversion_rates(
+                day_trials.get('trials_ended', 0),
+                day_trials.get('successful_trials', 0)
+            )
+            new_metrics.append(day_metrics)
+        
+        # Rows written concurrently for the same date win; re-read so the
+        # returned metrics are the stored ones. bulk_create skips post_save,
+        # so drop cached responses here
+        cls.objects.bulk_create(new_metrics, ignore_conflicts=True)
+        invalidate_metrics_cache()
+        metrics.update(
+            cls.objects.filter(metric_date__in=missing).in_bulk(field_name='metric_date')
+        )
+        return metrics
+    
+    @classmethod
+    def compute_range_summaries(cls, starts, end):
+        """
+        Revenue, signup and contract totals for metric dates in [start, end]
+        
+        `starts` maps a name to each range's start date. The ranges share
+        their end, so they are all read in one pass over the widest one
+        with conditional aggregates.
+        """
+        aggregates = {}
+        for name, start in starts.items():
+            in_range = models.Q(metric_date__gte=start)
+            aggregates[f'{name}__revenue'] = Sum('total_revenue', filter=in_range)
+            aggregates[f'{name}__new_users'] = Sum('new_registrations', filter=in_range)
+            aggregates[f'{name}__new_contracts'] = Sum('new_contracts', filter=in_range)
+            aggregates[f'{name}__days'] = Count('id', filter=in_range)
+        
+        totals = cls.objects.filter(
+            metric_date__gte=min(starts.values()),
+            metric_date__lte=end
+        ).aggregate(**aggregates)
+        
+        summaries = {name: {} for name in starts}
+        for key, value in totals.items():
+            name, field = key.split('__', 1)
+            summaries[name][field] = value
+        return summaries
+    
+    @classmethod
+    def calculate_daily_metrics(cls, date=None, recalculate=False):
+        """
+        Calculate and save daily metrics
+        
+        Existing metrics for the date are returned as-is unless
+        `recalculate` is set, in which case they are recomputed in place.
+        """
         if date is None:
             date = timezone.now().date()
         
         # Check if metrics already exist for this date
-        if cls.objects.filter(metric_date=date).exists():
-            return cls.objects.get(metric_date=date)
-        
-        metrics = cls(metric_date=date)
+        existing = cls.objects.filter(metric_date=date).first()
+        if existing and not recalculate:
+            return existing
         
-        # Calculate user metrics
-        from users.models import User, EmployerProfile, WorkerProfile
+        # Recompute onto the stored row so save() updates it in place
+        metrics = existing or cls(metric_date=date)
         
-        metrics.total_users = User.objects.filter(is_active=True).count()
-        metrics.active_employers = EmployerProfile.objects.filter(
-            user__is_active=True
-        ).count()
-        metrics.active_workers = WorkerProfile.objects.filter(
-            user__is_active=True,
-            availability='available'
-        ).count()
+        # Half-open bounds for the day; unlike __date lookups these let the
+        # (..., timestamp) composite indexes serve the range
+        day_start = timezone.make_aware(datetime.combine(date, time.min))
+        day_end = timezone.make_aware(datetime.combine(date + timedelta(days=1), time.min))
         
-        # Calculate growth metrics (last 24 hours)
-        yesterday = date - timezone.timedelta(days=1)
-        metrics.new_registrations = User.objects.filter(
-            date_joined__date=date
-        ).count()
-        metrics.new_employers = User.objects.filter(
-            role='employer',
-            date_joined__date=date
-        ).count()
-        metrics.new_workers = User.objects.filter(
-            role='worker',
-            date_joined__date=date
-        ).count()
+        # Calculate user metrics, one conditional aggregate over users
+        # (profiles are one-to-one, so joining them doesn't fan out rows)
+        joined_today = models.Q(created_at__gte=day_start, created_at__lt=day_end)
+        user_stats = User.objects.aggregate(
+            total_users=Count('id', filter=models.Q(is_active=True)),
+            active_employers=Count(
+                'employer_profile',
+                filter=models.Q(is_active=True)
+            ),
+            active_workers=Count(
+                'worker_profile',
+                filter=models.Q(is_active=True, worker_profile__availability='available')
+            ),
+            new_registrations=Count('id', filter=joined_today),
+            new_employers=Count('id', filter=joined_today & models.Q(role='employer')),
+            new_workers=Count('id', filter=joined_today & models.Q(role='worker')),
+        )
+        metrics.total_users = user_stats['total_users']
+        metrics.active_employers = user_stats['active_employers']
+        metrics.active_workers = user_stats['active_workers']
+        metrics.new_registrations = user_stats['new_registrations']
+        metrics.new_employers = user_stats['new_employers']
+        metrics.new_workers = user_stats['new_workers']
         
-        # Calculate contract metrics
-        metrics.active_contracts = Contract.objects.filter(
-            status='active'
-        ).count()
-        metrics.new_contracts = Contract.objects.filter(
-            created_at__date=date
-        ).count()
-        metrics.completed_contracts = Contract.objects.filter(
-            status='completed',
-            completed_at__date=date
-        ).count()
+        # Calculate contract and trial metrics
+        contract_stats = Contract.objects.aggregate(
+            active_contracts=Count('id', filter=models.Q(status='active')),
+            new_contracts=Count(
+                'id',
+                filter=models.Q(created_at__gte=day_start, created_at__lt=day_end)
+            ),
+            completed_contracts=Count(
+                'id',
+                filter=models.Q(
+                    status='completed',
+                    completed_at__gte=day_start,
+                    completed_at__lt=day_end
+                )
+            ),
+            trials_ended=Count('id', filter=models.Q(trial_end_date=date)),
+            successful_trials=Count(
+                'id',
+                filter=models.Q(trial_end_date=date, trial_passed=True)
+            ),
+        )
+        metrics.active_contracts = contract_stats['active_contracts']
+        metrics.new_contracts = contract_stats['new_contracts']
+        metrics.completed_contracts = contract_stats['completed_contracts']
         
         # Calculate financial metrics (for the day)
-        from payments.models import PaymentTransaction, EmployerInvoice
+        from payments.models import PaymentTransaction
         
-        daily_transactions = PaymentTransaction.objects.filter(
-            created_at__date=date,
-            status='completed'
+        financial_stats = PaymentTransaction.objects.filter(
+            status='successful',
+            transaction_type__in=['service_fee', 'worker_disbursement'],
+            completed_at__gte=day_start,
+            completed_at__lt=day_end
+        ).aggregate(
+            service_fees=Sum('amount', filter=models.Q(transaction_type='service_fee')),
+            worker_salaries=Sum(
+                'amount',
+                filter=models.Q(transaction_type='worker_disbursement')
+            ),
         )
-        
-        if daily_transactions.exists():
-            metrics.service_fees_collected = daily_transactions.filter(
-                transaction_type='service_fee'
-            ).aggregate(total=Sum('amount'))['total'] or 0
-            
-            metrics.worker_salaries_disbursed = daily_transactions.filter(
-                transaction_type='worker_disbursement'
-            ).aggregate(total=Sum('amount'))['total'] or 0
-        
+        metrics.service_fees_collected = financial_stats['service_fees'] or 0
+        metrics.worker_salaries_disbursed = financial_stats['worker_salaries'] or 0
         metrics.total_revenue = metrics.service_fees_collected
         
         # Calculate engagement metrics
@@ -129,37 +297,39 @@ class PlatformMetric(models.Model):
         from messaging.models import Message
         
         metrics.total_job_postings = JobPosting.objects.filter(
-            created_at__date=date
+            created_at__gte=day_start,
+            created_at__lt=day_end
         ).count()
         metrics.total_applications = JobApplication.objects.filter(
-            applied_at__date=date
+            applied_at__gte=day_start,
+            applied_at__lt=day_end
         ).count()
         metrics.total_messages = Message.objects.filter(
-            created_at__date=date,
-            is_system_message=False
+            is_system_message=False,
+            created_at__gte=day_start,
+            created_at__lt=day_end
         ).count()
         
-        # Calculate conversion metrics
-        if metrics.total_applications > 0:
-            hired_count = Contract.objects.filter(
-                created_at__date=date
-            ).count()
-            metrics.application_to_hire_rate = (
-                hired_count / metrics.total_applications * 100
-            )
-        
-        # Calculate trial success rate
-        trials_ended = Contract.objects.filter(
-            trial_end_date=date
+        metrics.set_conversion_rates(
+            contract_stats['trials_ended'],
+            contract_stats['successful_trials']
         )
-        if trials_ended.exists():
-            successful_trials = trials_ended.filter(trial_passed=True).count()
-            metrics.trial_success_rate = (
-                successful_trials / trials_ended.count() * 100
-            )
         
         metrics.save()
         return metrics
+    
+    def set_conversion_rates(self, trials_ended, successful_trials):
+        """Derive conversion rates from the day's counts"""
+        self.application_to_hire_rate = 0
+        if self.total_applications > 0:
+            self.application_to_hire_rate = (
+                self.new_contracts / self.total_applications * 100
+            )
+        
+        # Calculate trial success rate
+        self.trial_success_rate = 0
+        if trials_ended:
+            self.trial_success_rate = successful_trials / trials_ended * 100
 
 
 class UserActivityLog(models.Model):
@@ -201,7 +371,9 @@ class UserActivityLog(models.Model):
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['user', 'created_at']),
+            models.Index(fields=['user', 'action_type', 'created_at']),
             models.Index(fields=['action_type', 'created_at']),
+            # BRIN on Postgres (migration 0003): rows arrive in created_at order
             models.Index(fields=['created_at']),
         ]
     
@@ -6,10 +6,26 @@ from analytics.models import PlatformMetric, UserActivityLog
 class PlatformMetricSerializer(serializers.ModelSerializer):
     class Meta:
         model = PlatformMetric
-        fields = '__all__'
+        fields = (
+            'id', 'metric_date',
+            'total_users', 'active_employers', 'active_workers',
+            'new_registrations', 'new_employers', 'new_workers',
+            'active_contracts', 'new_contracts', 'completed_contracts',
+            'total_revenue', 'service_fees_collected', 'worker_salaries_disbursed',
+            'total_job_postings', 'total_applications', 'total_messages',
+            'application_to_hire_rate', 'trial_success_rate',
+            'created_at', 'updated_at',
+        )
         read_only_fields = ['created_at', 'updated_at']
 
 
+class PlatformMetricListSerializer(serializers.ModelSerializer):
+    """Headline figures only, for the metrics list"""
+    class Meta:
+        model = PlatformMetric
+        fields = ('id', 'metric_date', 'total_revenue', 'new_registrations', 'new_contracts')
+
+
 class UserActivityLogSerializer(serializers.ModelSerializer):
     user_email = serializers.EmailField(source='user.email', read_only=True)
     user_name = serializers.CharField(source='user.get_full_name', read_only=True)
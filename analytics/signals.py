@@ -0,0 +1,11 @@
+# analytics/signals.py
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from analytics.models import PlatformMetric
+from analytics.cache import invalidate_metrics_cache
+
+
+@receiver(post_save, sender=PlatformMetric)
+def invalidate_cached_metrics(sender, instance, **kwargs):
+    """Drop cached analytics responses once stored metrics change"""
+    invalidate_metrics_cache()
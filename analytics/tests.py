@@ -1 +1,214 @@
+# analytics/tests.py
+import uuid
+from datetime import datetime, time, timedelta
+from unittest import mock
+from django.db import DatabaseError
+from django.test import TestCase
+from django.utils import timezone
+from analytics import activity_buffer
+from analytics.models import PlatformMetric, UserActivityLog
+from analytics.tasks import drain_activity_buffer
+from contracts.models import Contract
+from users.models import User, EmployerProfile, WorkerProfile
+from users.tasks import send_welcome_email
 
+
+def create_user(role, email, phone):
+    """Active user; creating one queues a welcome email, which is patched out"""
+    with mock.patch.object(send_welcome_email, 'delay'):
+        return User.objects.create_user(
+            email, phone, 'test-pass-123',
+            role=role, first_name='Test', last_name=role.title()
+        )
+
+
+def buffered(*events):
+    """Raw buffer items for the events, as enqueue pushes them to Redis"""
+    client = mock.Mock()
+    with mock.patch.object(activity_buffer, 'get_redis_client', return_value=client):
+        for event in events:
+            activity_buffer.enqueue(**event)
+    return [call.args[1] for call in client.rpush.call_args_list]
+
+
+def midday(day):
+    return timezone.make_aware(datetime.combine(day, time(12)))
+
+
+class PlatformMetricTests(TestCase):
+    """
+    Two days of activity: an employer and a worker join and three contracts
+    start on the first day, whose trials end half passed; another worker
+    joins and one contract completes on the second day
+    """
+    
+    @classmethod
+    def setUpTestData(cls):
+        cls.day = timezone.now().date() - timedelta(days=2)
+        cls.next_day = cls.day + timedelta(days=1)
+        
+        employer = create_user('employer', 'employer@example.com', '+256700000001')
+        worker = create_user('worker', 'worker@example.com', '+256700000002')
+        late_worker = create_user('worker', 'late-worker@example.com', '+256700000003')
+        User.objects.exclude(pk=late_worker.pk).update(created_at=midday(cls.day))
+        User.objects.filter(pk=late_worker.pk).update(created_at=midday(cls.next_day))
+        
+        employer_profile = EmployerProfile.objects.create(user=employer, first_name='Test', last_name='Employer')
+        worker_profile = WorkerProfile.objects.create(user=worker, first_name='Test', last_name='Worker')
+        WorkerProfile.objects.create(user=late_worker, first_name='Late', last_name='Worker')
+        
+        for trial_passed in (True, False, None):
+            Contract.objects.create(
+                employer=employer_profile, worker=worker_profile,
+                job_title='Housekeeper', job_description='Cleaning',
+                worker_salary_amount=400000, service_fee_amount=100000,
+                start_date=cls.day, trial_passed=trial_passed,
+                # Left unset, the trial ends two weeks after the start
+                trial_end_date=cls.day if trial_passed is not None else None
+            )
+        Contract.objects.update(created_at=midday(cls.day))
+        Contract.objects.filter(trial_passed__isnull=True).update(
+            status=Contract.ContractStatus.COMPLETED, completed_at=midday(cls.next_day)
+        )
+    
+    def assertMetrics(self, metrics, **expected):
+        self.assertEqual(
+            {field: getattr(metrics, field) for field in expected}, expected
+        )
+    
+    def test_daily_metrics(self):
+        metrics = PlatformMetric.calculate_daily_metrics(self.day)
+        
+        self.assertMetrics(
+            metrics,
+            total_users=3, active_employers=1, active_workers=2,
+            new_registrations=2, new_employers=1, new_workers=1,
+            active_contracts=0, new_contracts=3, completed_contracts=0,
+            total_messages=0, trial_success_rate=50
+        )
+        self.assertMetrics(
+            PlatformMetric.calculate_daily_metrics(self.next_day),
+            new_registrations=1, new_employers=0, new_workers=1,
+            new_contracts=0, completed_contracts=1, trial_success_rate=0
+        )
+    
+    def test_stored_daily_metrics_are_recalculated_only_on_request(self):
+        stored = PlatformMetric.calculate_daily_metrics(self.day)
+        PlatformMetric.objects.filter(pk=stored.pk).update(new_registrations=99)
+        
+        self.assertEqual(PlatformMetric.calculate_daily_metrics(self.day).new_registrations, 99)
+        
+        recalculated = PlatformMetric.calculate_daily_metrics(self.day, recalculate=True)
+        self.assertEqual(recalculated.pk, stored.pk)
+        self.assertEqual(recalculated.created_at, stored.created_at)
+        self.assertEqual(recalculated.new_registrations, 2)
+        self.assertEqual(PlatformMetric.objects.get().new_registrations, 2)
+    
+    def test_bulk_metrics_match_the_daily_calculation(self):
+        fields = [
+            field.name for field in PlatformMetric._meta.concrete_fields
+            if field.name not in ('id', 'created_at', 'updated_at')
+        ]
+        bulk = {
+            day: {field: getattr(metrics, field) for field in fields}
+            for day, metrics in PlatformMetric.calculate_metrics_bulk([self.day, self.next_day]).items()
+        }
+        self.assertEqual(set(bulk), {self.day, self.next_day})
+        self.assertEqual(bulk[self.day]['new_registrations'], 2)
+        
+        PlatformMetric.objects.all().delete()
+        for day, values in bulk.items():
+            daily = PlatformMetric.calculate_daily_metrics(day)
+            daily.refresh_from_db()
+            self.assertEqual(values, {field: getattr(daily, field) for field in fields})
+    
+    def test_bulk_metrics_keep_stored_rows(self):
+        stored = PlatformMetric.objects.create(metric_date=self.next_day, new_registrations=99)
+        
+        metrics = PlatformMetric.calculate_metrics_bulk([self.day, self.next_day])
+        
+        self.assertEqual(metrics[self.next_day].pk, stored.pk)
+        self.assertEqual(metrics[self.next_day].new_registrations, 99)
+        self.assertEqual(metrics[self.day].new_registrations, 2)
+        self.assertEqual(PlatformMetric.objects.count(), 2)
+
+
+@mock.patch.object(activity_buffer, 'push_recent')
+@mock.patch.object(activity_buffer, 'requeue')
+class DrainActivityBufferTests(TestCase):
+    """drain_activity_buffer with the Redis side of the buffer mocked"""
+    
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user('worker', 'active@example.com', '+256700000004')
+    
+    def test_writes_events_and_feeds_the_recent_list(self, requeue, push_recent):
+        items = buffered(
+            {'user_id': self.user.id, 'action_type': 'login', 'ip_address': '10.0.0.1'},
+            # User deleted since the event was buffered
+            {'user_id': uuid.uuid4(), 'action_type': 'login'},
+        )
+        
+        with mock.patch.object(activity_buffer, 'pop_batch', side_effect=[items]):
+            result = drain_activity_buffer()
+        
+        self.assertEqual(result, {"success": True, "inserted": 1})
+        log = UserActivityLog.objects.get()
+        self.assertEqual(log.user_id, self.user.id)
+        self.assertEqual(log.ip_address, '10.0.0.1')
+        
+        recent, = push_recent.call_args.args
+        self.assertEqual(len(recent), 1)
+        self.assertEqual(recent[0]['user_email'], 'active@example.com')
+        self.assertEqual(recent[0]['user_name'], 'Test Worker')
+        requeue.assert_not_called()
+    
+    def test_drains_until_a_batch_comes_back_short(self, requeue, push_recent):
+        first, second = buffered(
+            {'user_id': self.user.id, 'action_type': 'login'},
+            {'user_id': self.user.id, 'action_type': 'logout'},
+        )
+        
+        with mock.patch.object(activity_buffer, 'DRAIN_BATCH_SIZE', 1), \
+                mock.patch.object(activity_buffer, 'pop_batch', side_effect=[[first], [second], []]) as pop_batch:
+            result = drain_activity_buffer()
+        
+        self.assertEqual(result["inserted"], 2)
+        self.assertEqual(pop_batch.call_count, 3)
+        self.assertEqual(UserActivityLog.objects.count(), 2)
+    
+    def test_failed_insert_puts_the_batch_back(self, requeue, push_recent):
+        items = buffered({'user_id': self.user.id, 'action_type': 'login'})
+        
+        with mock.patch.object(activity_buffer, 'pop_batch', side_effect=[items]), \
+                mock.patch.object(UserActivityLog.objects, 'bulk_create', side_effect=DatabaseError):
+            result = drain_activity_buffer()
+        
+        self.assertEqual(result["inserted"], 0)
+        requeue.assert_called_once_with(items)
+        push_recent.assert_not_called()
+
+
+class ActivityBufferTests(TestCase):
+    """Redis commands behind the buffer"""
+    
+    def test_requeue_restores_the_original_order_at_the_head(self):
+        client = mock.Mock()
+        with mock.patch.object(activity_buffer, 'get_redis_client', return_value=client):
+            activity_buffer.requeue([b'first', b'second', b'third'])
+        
+        # LPUSH inserts one at a time, so the last pushed ends up first
+        client.lpush.assert_called_once_with(
+            activity_buffer.BUFFER_KEY, b'third', b'second', b'first'
+        )
+    
+    def test_pop_batch_reads_and_trims_in_one_transaction(self):
+        client = mock.Mock()
+        pipe = client.pipeline.return_value
+        pipe.execute.return_value = [[b'first'], True]
+        with mock.patch.object(activity_buffer, 'get_redis_client', return_value=client):
+            items = activity_buffer.pop_batch(size=10)
+        
+        self.assertEqual(items, [b'first'])
+        pipe.lrange.assert_called_once_with(activity_buffer.BUFFER_KEY, 0, 9)
+        pipe.ltrim.assert_called_once_with(activity_buffer.BUFFER_KEY, 10, -1)
@@ -2,35 +2,76 @@
 from rest_framework import viewsets, status, permissions, generics
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.db.models import Sum, Count, Avg, Q
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Sum, Count, Max, Q, F, Value
+from django.db.models.functions import Concat, Trim
 from django.utils import timezone
 from datetime import datetime, timedelta
 
+from analytics import activity_buffer, leaderboards
+from analytics.cache import metrics_cache_key
 from analytics.models import PlatformMetric, UserActivityLog
 from analytics.serializers import (
-    PlatformMetricSerializer, UserActivityLogSerializer,
+    PlatformMetricSerializer, PlatformMetricListSerializer, UserActivityLogSerializer,
     DateRangeSerializer, MetricsSummarySerializer
 )
 from users.permissions import IsAdmin
 
+# Past days' metrics only change on an explicit recalculation, which
+# invalidates the cache anyway
+CLOSED_DAY_CACHE_TTL = 60 * 60 * 24
+
+# Columns of UserActivityLogSerializer, for list endpoints that skip the
+# serializer and read rows straight into dicts
+ACTIVITY_LOG_VALUES = (
+    'id', 'user', 'action_type', 'entity_type', 'entity_id',
+    'ip_address', 'user_agent', 'location', 'data', 'created_at',
+)
+
+
+def activity_log_rows(queryset):
+    return queryset.values(
+        *ACTIVITY_LOG_VALUES,
+        user_email=F('user__email'),
+        user_name=Trim(Concat('user__first_name', Value(' '), 'user__last_name'))
+    )
+
 
 class PlatformMetricViewSet(viewsets.ReadOnlyModelViewSet):
     """ViewSet for platform metrics (Admin only)"""
     serializer_class = PlatformMetricSerializer
     permission_classes = [permissions.IsAuthenticated, IsAdmin]
-    queryset = PlatformMetric.objects.all().order_by('-metric_date')
+    
+    def get_queryset(self):
+        metrics = PlatformMetric.objects.order_by('-metric_date')
+        if self.action == 'list':
+            # Read just the columns the list serializer renders
+            return metrics.only(*PlatformMetricListSerializer.Meta.fields)
+        return metrics
+    
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return PlatformMetricListSerializer
+        return super().get_serializer_class()
     
     @action(detail=False, methods=['get'])
     def today(self, request):
         """Get today's metrics"""
         today = timezone.now().date()
         
-        # Calculate or get today's metrics
-        from analytics.models import PlatformMetric
-        metrics, created = PlatformMetric.calculate_daily_metrics(today)
+        def compute():
+            # Calculate or get today's metrics
+            metrics = PlatformMetric.calculate_daily_metrics(today)
+            return dict(self.get_serializer(metrics).data)
         
-        serializer = self.get_serializer(metrics)
-        return Response(serializer.data)
+        data = cache.get_or_set(
+            metrics_cache_key('today', today),
+            compute,
+            timeout=settings.ANALYTICS_METRICS_CACHE_TTL
+        )
+        return Response(data)
     
     @action(detail=False, methods=['post'])
     def range(self, request):
@@ -43,6 +84,15 @@ class PlatformMetricViewSet(viewsets.ReadOnlyModelViewSet):
         start_date = data['start_date']
         end_date = data['end_date']
         
+        # Backfill closed days that have no metrics yet in one pass
+        last_closed_day = min(end_date, timezone.now().date() - timedelta(days=1))
+        closed_days = [
+            start_date + timedelta(days=offset)
+            for offset in range((last_closed_day - start_date).days + 1)
+        ]
+        if closed_days:
+            PlatformMetric.calculate_metrics_bulk(closed_days)
+        
         metrics = PlatformMetric.objects.filter(
             metric_date__gte=start_date,
             metric_date__lte=end_date
@@ -75,62 +125,58 @@ class PlatformMetricViewSet(viewsets.ReadOnlyModelViewSet):
         yesterday = today - timedelta(days=1)
         last_week = today - timedelta(days=7)
         last_month = today - timedelta(days=30)
+        ttl = settings.ANALYTICS_METRICS_CACHE_TTL
         
-        # Today's metrics
-        today_metrics, _ = PlatformMetric.calculate_daily_metrics(today)
-        
-        # Yesterday's metrics
-        yesterday_metrics, _ = PlatformMetric.calculate_daily_metrics(yesterday)
+        def day_totals(metrics):
+            return {
+                "revenue": metrics.total_revenue,
+                "new_users": metrics.new_registrations,
+                "new_contracts": metrics.new_contracts
+            }
         
-        # Weekly metrics
-        weekly_metrics = PlatformMetric.objects.filter(
-            metric_date__gte=last_week,
-            metric_date__lte=today
-        )
-        weekly_totals = weekly_metrics.aggregate(
-            revenue=Sum('total_revenue'),
-            new_users=Sum('new_registrations'),
-            new_contracts=Sum('new_contracts')
-        )
+        def current_counts():
+            from users.models import User
+            from contracts.models import Contract
+            from job_postings.models import JobPosting
+            
+            counts = User.objects.aggregate(
+                total_users=Count('id', filter=Q(is_active=True)),
+                active_employers=Count('id', filter=Q(role='employer', is_active=True)),
+                active_workers=Count('id', filter=Q(role='worker', is_active=True))
+            )
+            counts['active_contracts'] = Contract.objects.filter(status='active').count()
+            counts['active_jobs'] = JobPosting.objects.filter(status='active').count()
+            return counts
         
-        # Monthly metrics
-        monthly_metrics = PlatformMetric.objects.filter(
-            metric_date__gte=last_month,
-            metric_date__lte=today
-        )
-        monthly_totals = monthly_metrics.aggregate(
-            revenue=Sum('total_revenue'),
-            new_users=Sum('new_registrations'),
-            new_contracts=Sum('new_contracts')
-        )
+        # Today's and yesterday's metrics: one cache round trip, and one
+        # query for whichever of the two isn't cached
+        day_ttls = {today: ttl, yesterday: CLOSED_DAY_CACHE_TTL}
+        day_keys = {day: metrics_cache_key('day', day) for day in day_ttls}
+        days = cache.get_many(list(day_keys.values()))
         
-        # Get current counts
-        from users.models import User
-        from contracts.models import Contract
-        from job_postings.models import JobPosting
+        missing = [day for day, key in day_keys.items() if key not in days]
+        if missing:
+            for day, metrics in PlatformMetric.calculate_metrics_bulk(missing).items():
+                days[day_keys[day]] = day_totals(metrics)
+                cache.set(day_keys[day], days[day_keys[day]], timeout=day_ttls[day])
         
-        current_counts = {
-            'total_users': User.objects.filter(is_active=True).count(),
-            'active_employers': User.objects.filter(role='employer', is_active=True).count(),
-            'active_workers': User.objects.filter(role='worker', is_active=True).count(),
-            'active_contracts': Contract.objects.filter(status='active').count(),
-            'active_jobs': JobPosting.objects.filter(status='active').count(),
-        }
+        # The weekly range sits inside the monthly one: one query for both
+        ranges = cache.get_or_set(
+            metrics_cache_key('ranges', last_week, last_month, today),
+            lambda: PlatformMetric.compute_range_summaries(
+                {'weekly': last_week, 'monthly': last_month}, today
+            ),
+            timeout=ttl
+        )
         
         return Response({
-            "today": {
-                "revenue": today_metrics.total_revenue,
-                "new_users": today_metrics.new_registrations,
-                "new_contracts": today_metrics.new_contracts
-            },
-            "yesterday": {
-                "revenue": yesterday_metrics.total_revenue if yesterday_metrics else 0,
-                "new_users": yesterday_metrics.new_registrations if yesterday_metrics else 0,
-                "new_contracts": yesterday_metrics.new_contracts if yesterday_metrics else 0
-            },
-            "weekly": weekly_totals,
-            "monthly": monthly_totals,
-            "current": current_counts
+            "today": days[day_keys[today]],
+            "yesterday": days[day_keys[yesterday]],
+            "weekly": ranges['weekly'],
+            "monthly": ranges['monthly'],
+            "current": cache.get_or_set(
+                metrics_cache_key('current'), current_counts, timeout=ttl
+            )
         })
     
     @action(detail=False, methods=['get'])
@@ -139,26 +185,51 @@ class PlatformMetricViewSet(viewsets.ReadOnlyModelViewSet):
         # Last 30 days revenue
         last_30_days = timezone.now().date() - timedelta(days=30)
         
-        daily_revenue = PlatformMetric.objects.filter(
-            metric_date__gte=last_30_days
-        ).values('metric_date').annotate(
-            revenue=Sum('total_revenue')
-        ).order_by('metric_date')
+        data = cache.get_or_set(
+            metrics_cache_key('revenue', last_30_days),
+            lambda: self._revenue_data(last_30_days),
+            timeout=settings.ANALYTICS_METRICS_CACHE_TTL
+        )
+        return Response(data)
+    
+    def _revenue_data(self, last_30_days):
+        # metric_date is unique, so each row already is one day's revenue
+        metrics = PlatformMetric.objects.filter(metric_date__gte=last_30_days)
+        
+        if connection.vendor == 'postgresql':
+            from django.contrib.postgres.aggregates import JSONBAgg
+            
+            # Assemble the chart columns in the database
+            columns = metrics.aggregate(
+                labels=JSONBAgg('metric_date', order_by='metric_date'),
+                data=JSONBAgg('total_revenue', order_by='metric_date'),
+                total=Sum('total_revenue')
+            )
+            labels = columns['labels'] or []
+            data = columns['data'] or []
+            total_revenue = columns['total'] or 0
+        else:
+            daily_revenue = list(
+                metrics.order_by('metric_date').values_list('metric_date', 'total_revenue')
+            )
+            labels = [str(metric_date) for metric_date, _ in daily_revenue]
+            data = [float(revenue) for _, revenue in daily_revenue]
+            total_revenue = sum(revenue for _, revenue in daily_revenue)
         
         # Format for chart
         revenue_data = {
-            'labels': [str(item['metric_date']) for item in daily_revenue],
+            'labels': labels,
             'datasets': [{
                 'label': 'Revenue (UGX)',
-                'data': [float(item['revenue']) for item in daily_revenue]
+                'data': data
             }]
         }
         
-        return Response({
+        return {
             "revenue_data": revenue_data,
-            "total_revenue_30d": sum(item['revenue'] for item in daily_revenue),
-            "average_daily_revenue": sum(item['revenue'] for item in daily_revenue) / 30
-        })
+            "total_revenue_30d": total_revenue,
+            "average_daily_revenue": total_revenue / 30
+        }
 
 
 class UserActivityLogViewSet(viewsets.ReadOnlyModelViewSet):
@@ -170,41 +241,54 @@ class UserActivityLogViewSet(viewsets.ReadOnlyModelViewSet):
     @action(detail=False, methods=['get'])
     def recent(self, request):
         """Get recent activity"""
-        recent_activity = UserActivityLog.objects.all().order_by('-created_at')[:100]
-        serializer = self.get_serializer(recent_activity, many=True)
-        return Response(serializer.data)
+        recent_activity = activity_buffer.get_recent()
+        if not recent_activity:
+            # Cold start: read the table once and seed the list from it
+            recent_activity = list(activity_log_rows(
+                UserActivityLog.objects.order_by('-created_at')
+            )[:activity_buffer.RECENT_SIZE])
+            activity_buffer.push_recent(recent_activity[::-1], seed=True)
+        return Response(recent_activity)
     
     @action(detail=False, methods=['get'])
     def user_activity(self, request, user_id=None):
         """Get activity for a specific user"""
+        from django.core.exceptions import ValidationError
         from users.models import User
         
+        user_id = user_id or request.query_params.get('user_id')
         try:
-            user = User.objects.get(id=user_id)
-        except User.DoesNotExist:
+            user = User.objects.filter(id=user_id).values(
+                'id', 'email', 'role', 'created_at'
+            ).first()
+        except ValidationError:
+            user = None  # not a UUID
+        
+        if user is None:
             return Response(
                 {"error": "User not found"},
                 status=status.HTTP_404_NOT_FOUND
             )
         
-        activity_logs = UserActivityLog.objects.filter(user=user).order_by('-created_at')[:50]
-        serializer = self.get_serializer(activity_logs, many=True)
+        activity_logs = activity_log_rows(
+            UserActivityLog.objects.filter(user_id=user['id']).order_by('-created_at')
+        )[:50]
         
-        # Activity summary
-        summary = activity_logs.values('action_type').annotate(
+        # Activity summary over all of the user's logs, not just the page above
+        summary = UserActivityLog.objects.filter(user_id=user['id']).values('action_type').annotate(
             count=Count('id'),
             last_activity=Max('created_at')
         ).order_by('-count')
         
         return Response({
             "user": {
-                "id": str(user.id),
-                "email": user.email,
-                "role": user.role,
-                "joined": user.date_joined
+                "id": str(user['id']),
+                "email": user['email'],
+                "role": user['role'],
+                "joined": user['created_at']
             },
-            "activity_logs": serializer.data,
-            "summary": summary
+            "activity_logs": list(activity_logs),
+            "summary": list(summary)
         })
 
 
@@ -214,15 +298,31 @@ class AnalyticsDashboardView(generics.GenericAPIView):
     
     def get(self, request):
         """Get dashboard data"""
+        data = cache.get_or_set(
+            metrics_cache_key('dashboard'),
+            self._dashboard_data,
+            timeout=settings.ANALYTICS_METRICS_CACHE_TTL
+        )
+        
+        # Top workers and employers, refreshed nightly
+        top_performers = leaderboards.get()
+        
+        return Response({
+            **data,
+            "top_workers": top_performers['top_workers'],
+            "top_employers": top_performers['top_employers']
+        })
+    
+    def _dashboard_data(self):
         # User growth
         from users.models import User
         from django.db.models.functions import TruncDay
         
         last_30_days = timezone.now() - timedelta(days=30)
         user_growth = User.objects.filter(
-            date_joined__gte=last_30_days
+            created_at__gte=last_30_days
         ).annotate(
-            day=TruncDay('date_joined')
+            day=TruncDay('created_at')
         ).values('day').annotate(
             count=Count('id')
         ).order_by('day')
@@ -231,59 +331,19 @@ class AnalyticsDashboardView(generics.GenericAPIView):
         from contracts.models import Contract
         contract_status = Contract.objects.values('status').annotate(
             count=Count('id')
-        )
+        ).order_by()
         
         # Revenue by category
         from payments.models import PaymentTransaction
         revenue_by_category = PaymentTransaction.objects.filter(
-            status='completed',
-            created_at__gte=last_30_days
+            status='successful',
+            completed_at__gte=last_30_days
         ).values('transaction_type').annotate(
             total=Sum('amount')
-        )
-        
-        # Top performing workers
-        from reviews.models import Review
-        top_workers = User.objects.filter(
-            role='worker',
-            reviews_received__is_verified=True
-        ).annotate(
-            avg_rating=Avg('reviews_received__rating'),
-            review_count=Count('reviews_received')
-        ).filter(
-            review_count__gte=3
-        ).order_by('-avg_rating')[:10]
-        
-        # Top employers
-        top_employers = User.objects.filter(
-            role='employer'
-        ).annotate(
-            contracts_count=Count('employerprofile__contracts'),
-            total_spent=Sum('employerprofile__contracts__total_monthly_cost')
-        ).filter(
-            contracts_count__gte=1
-        ).order_by('-total_spent')[:10]
+        ).order_by()
         
-        return Response({
+        return {
             "user_growth": list(user_growth),
             "contract_status": list(contract_status),
-            "revenue_by_category": list(revenue_by_category),
-            "top_workers": [
-                {
-                    "id": str(user.id),
-                    "name": user.get_full_name(),
-                    "avg_rating": user.avg_rating,
-                    "review_count": user.review_count
-                }
-                for user in top_workers
-            ],
-            "top_employers": [
-                {
-                    "id": str(user.id),
-                    "name": user.get_full_name(),
-                    "contracts_count": user.contracts_count,
-                    "total_spent": user.total_spent or 0
-                }
-                for user in top_employers
-            ]
-        })
+            "revenue_by_category": list(revenue_by_category)
+        }
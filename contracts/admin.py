@@ -8,8 +8,18 @@ class ContractAdmin(admin.ModelAdmin):
     list_filter = ('status', 'contract_type', 'is_trial', 'start_date')
     search_fields = ('job_title', 'employer__user__email', 'worker__user__email', 
                     'employer__first_name', 'worker__first_name')
-    readonly_fields = ('created_at', 'updated_at', 'activated_at', 'completed_at')
+    readonly_fields = ('total_monthly_cost', 'created_at', 'updated_at', 'activated_at', 'completed_at')
     raw_id_fields = ('employer', 'worker', 'category', 'created_by')
+    list_select_related = ('employer', 'worker', 'category')
+    
+    def get_queryset(self, request):
+        # The change list shows none of the text columns; the change form
+        # keeps the full rows so it doesn't load them one by one
+        opts = self.model._meta
+        changelist = f'{opts.app_label}_{opts.model_name}_changelist'
+        if request.resolver_match and request.resolver_match.url_name == changelist:
+            return super().get_queryset(request).defer(*Contract.objects.HEAVY_FIELDS)
+        return super().get_queryset(request)
     
     fieldsets = (
         ('Contract Details', {
@@ -52,6 +62,9 @@ class ContractReplacementAdmin(admin.ModelAdmin):
                     'replacement_worker__first_name')
     raw_id_fields = ('original_contract', 'original_worker', 'replacement_worker', 
                     'new_contract', 'requested_by')
+    # Contract.__str__ reads the employer and worker names
+    list_select_related = ('original_contract__employer', 'original_contract__worker',
+                           'original_worker', 'replacement_worker')
     
     readonly_fields = ('requested_at', 'completed_at')
 
@@ -61,6 +74,7 @@ class ContractDocumentAdmin(admin.ModelAdmin):
     list_filter = ('document_type',)
     search_fields = ('document_name', 'contract__job_title')
     raw_id_fields = ('contract', 'uploaded_by')
+    list_select_related = ('contract__employer', 'contract__worker', 'uploaded_by')
     readonly_fields = ('uploaded_at',)
 
 
@@ -0,0 +1,16 @@
+# contracts/db.py
+from django.contrib.postgres.functions import RandomUUID as PostgresRandomUUID
+
+
+class RandomUUID(PostgresRandomUUID):
+    """
+    Random UUID generated by the database
+    
+    gen_random_uuid() on Postgres 13+; sqlite has no UUID function, so it
+    gets 16 random bytes as the 32 hex digits UUIDField stores there.
+    """
+    
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return self.as_sql(
+            compiler, connection, template='LOWER(HEX(RANDOMBLOB(16)))', **extra_context
+        )
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.10 on 2026-10-16 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contracts', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='contract',
+            index=models.Index(fields=['status', 'completed_at'], name='contracts_status_813cf7_idx'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.10 on 2026-10-16 12:00
+
+from django.db import migrations
+
+
+def create_work_location_trgm_index(apps, schema_editor):
+    # Trigram GIN indexes are Postgres-only; other backends keep scanning
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    # icontains compiles to UPPER(work_location) LIKE UPPER(%s), so index that expression
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS contracts_work_location_trgm_idx '
+        'ON contracts USING gin (UPPER(work_location) gin_trgm_ops)'
+    )
+
+
+def drop_work_location_trgm_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    
+    schema_editor.execute('DROP INDEX IF EXISTS contracts_work_location_trgm_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contracts', '0003_contract_contracts_status_813cf7_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            create_work_location_trgm_index,
+            drop_work_location_trgm_index,
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.10 on 2026-10-16 12:00
+
+import django.db.models.expressions
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contracts', '0005_contract_hot_filter_indexes'),
+    ]
+
+    operations = [
+        # Regular columns can't be altered into generated ones; the stored
+        # value is recomputed from the salary and fee columns on re-add
+        migrations.RemoveField(
+            model_name='contract',
+            name='total_monthly_cost',
+        ),
+        migrations.AddField(
+            model_name='contract',
+            name='total_monthly_cost',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.expressions.CombinedExpression(models.F('worker_salary_amount'), '+', models.F('service_fee_amount')), output_field=models.IntegerField()),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.10 on 2026-10-16 12:00
+
+import contracts.db
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contracts', '0006_alter_contract_total_monthly_cost'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='contract',
+            name='id',
+            field=models.UUIDField(db_default=contracts.db.RandomUUID(), editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='contractdocument',
+            name='id',
+            field=models.UUIDField(db_default=contracts.db.RandomUUID(), editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='contractreplacement',
+            name='id',
+            field=models.UUIDField(db_default=contracts.db.RandomUUID(), editable=False, primary_key=True, serialize=False),
+        ),
+    ]
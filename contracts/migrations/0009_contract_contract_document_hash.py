@@ -0,0 +1,18 @@
+# Generated by Django 5.2.10 on 2026-10-16 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contracts', '0008_contract_contract_document_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contract',
+            name='contract_document_hash',
+            field=models.CharField(blank=True, max_length=32, null=True),
+        ),
+    ]
@@ -1,15 +1,31 @@
-import uuid
-import json
-from django.db import models
+from functools import cached_property
+from django.db import connections, models
 from django.utils import timezone
 from datetime import timedelta, date
 
+from contracts.db import RandomUUID
 from users.models import User, EmployerProfile, WorkerProfile, JobCategory
 
 
+class ContractModelManager(models.Manager):
+    """Custom manager for contracts"""
+    
+    # Free-text and signature columns that can run to several KB per row
+    HEAVY_FIELDS = (
+        'job_description', 'trial_feedback', 'termination_reason',
+        'signature_data_employer', 'signature_data_worker', 'work_schedule'
+    )
+    
+    def lean(self, *keep):
+        """Contracts with the heavy columns deferred, except those in `keep`"""
+        return self.defer(*(field for field in self.HEAVY_FIELDS if field not in keep))
+
+
 class Contract(models.Model):
     """Contract between employer and worker"""
     
+    objects = ContractModelManager()
+    
     class ContractType(models.TextChoices):
         FULL_TIME = 'full_time', 'Full Time'
         PART_TIME = 'part_time', 'Part Time'
@@ -24,7 +40,7 @@ class Contract(models.Model):
         TERMINATED = 'terminated', 'Terminated'
         CANCELLED = 'cancelled', 'Cancelled'
     
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, db_default=RandomUUID(), editable=False)
     employer = models.ForeignKey(EmployerProfile, on_delete=models.SET_NULL, null=True, related_name='contracts')
     worker = models.ForeignKey(WorkerProfile, on_delete=models.SET_NULL, null=True, related_name='contracts')
     category = models.ForeignKey(JobCategory, on_delete=models.SET_NULL, null=True, related_name='contracts')
@@ -38,7 +54,11 @@ class Contract(models.Model):
     # Financial terms
     worker_salary_amount = models.IntegerField()  # Full salary amount
     service_fee_amount = models.IntegerField()  # WorkConnect's fee
-    total_monthly_cost = models.IntegerField()  # salary + service_fee
+    total_monthly_cost = models.GeneratedField(  # salary + service_fee
+        expression=models.F('worker_salary_amount') + models.F('service_fee_amount'),
+        output_field=models.IntegerField(),
+        db_persist=True
+    )
     payment_frequency = models.CharField(max_length=50, default='monthly')
     
     # Contract dates
@@ -59,6 +79,8 @@ class Contract(models.Model):
     
     # Contract document
     contract_document_url = models.URLField(blank=True, null=True)
+    contract_document_key = models.CharField(max_length=255, blank=True, null=True)  # S3 object key
+    contract_document_hash = models.CharField(max_length=32, blank=True, null=True)  # Hash of the rendered fields
     signed_by_employer = models.BooleanField(default=False)
     signed_by_worker = models.BooleanField(default=False)
     employer_signature_date = models.DateTimeField(null=True, blank=True)
@@ -89,6 +111,14 @@ class Contract(models.Model):
             models.Index(fields=['trial_end_date']),
             models.Index(fields=['start_date']),
             models.Index(fields=['created_at']),
+            models.Index(fields=['status', 'completed_at']),
+            models.Index(fields=['status', 'start_date']),
+            models.Index(fields=['employer', 'status']),
+            models.Index(
+                fields=['status'],
+                name='contracts_active_idx',
+                condition=models.Q(status='active')
+            ),
         ]
         ordering = ['-created_at']
     
@@ -97,15 +127,14 @@ class Contract(models.Model):
         worker_name = f"{self.worker.first_name} {self.worker.last_name}" if self.worker else "Unknown"
         return f"{self.job_title} - {employer_name} & {worker_name}"
     
+    # Cached trial-state properties, cleared on save
+    TRIAL_STATE_ATTRS = ('days_until_trial_end', 'is_active_trial', 'can_request_replacement')
+    
     def save(self, *args, **kwargs):
         # Calculate trial end date
         if self.start_date and self.trial_duration_days and not self.trial_end_date:
             self.trial_end_date = self.start_date + timedelta(days=self.trial_duration_days)
         
-        # Calculate total monthly cost
-        if self.worker_salary_amount and self.service_fee_amount:
-            self.total_monthly_cost = self.worker_salary_amount + self.service_fee_amount
-        
         # Update status based on trial
         if self.is_trial and self.status == self.ContractStatus.ACTIVE:
             self.status = self.ContractStatus.TRIAL
@@ -118,41 +147,57 @@ class Contract(models.Model):
             if not self.activated_at:
                 self.activated_at = timezone.now()
         
+        adding = self._state.adding
+        update_fields = kwargs.get('update_fields')
         super().save(*args, **kwargs)
-    
-    @property
-    def is_active_trial(self):
-        """Check if contract is in active trial period"""
-        if not self.is_trial or self.status != self.ContractStatus.TRIAL:
-            return False
         
-        today = date.today()
-        return self.start_date <= today <= self.trial_end_date
+        # total_monthly_cost is computed by the database. Inserts read it back
+        # with RETURNING where the backend supports it; otherwise reload it on
+        # next access, unless this save couldn't have changed it
+        if adding:
+            stale = not connections[self._state.db].features.can_return_columns_from_insert
+        else:
+            stale = update_fields is None or not {
+                'worker_salary_amount', 'service_fee_amount'
+            }.isdisjoint(update_fields)
+        if stale:
+            self.__dict__.pop('total_monthly_cost', None)
+        
+        # Status or dates may have changed; recompute trial state on next read
+        for attr in self.TRIAL_STATE_ATTRS:
+            self.__dict__.pop(attr, None)
     
-    @property
+    @cached_property
     def days_until_trial_end(self):
-        """Days remaining until trial ends"""
-        if not self.is_active_trial:
+        """Days remaining until trial ends, None outside an active trial"""
+        if not self.is_trial or self.status != self.ContractStatus.TRIAL:
             return None
         
         today = date.today()
+        if not self.start_date <= today <= self.trial_end_date:
+            return None
         return (self.trial_end_date - today).days
     
-    @property
+    @cached_property
+    def is_active_trial(self):
+        """Check if contract is in active trial period"""
+        return self.days_until_trial_end is not None
+    
+    @cached_property
     def can_request_replacement(self):
         """Check if replacement can be requested"""
-        return self.is_active_trial and self.days_until_trial_end > 0
+        days_left = self.days_until_trial_end
+        return days_left is not None and days_left > 0
     
     def get_work_schedule_display(self):
         """Format work schedule for display"""
         if not self.work_schedule:
             return "Not specified"
         
-        try:
-            schedule = json.loads(self.work_schedule) if isinstance(self.work_schedule, str) else self.work_schedule
-            return ", ".join([f"{day}: {time}" for day, time in schedule.items()])
-        except:
+        # JSONField already hands back decoded data
+        if not isinstance(self.work_schedule, dict):
             return str(self.work_schedule)
+        return ", ".join(f"{day}: {hours}" for day, hours in self.work_schedule.items())
 
 
 class ContractReplacement(models.Model):
@@ -164,7 +209,7 @@ class ContractReplacement(models.Model):
         COMPLETED = 'completed', 'Completed'
         CANCELLED = 'cancelled', 'Cancelled'
     
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, db_default=RandomUUID(), editable=False)
     
     # Original contract details
     original_contract = models.ForeignKey(Contract, on_delete=models.CASCADE, related_name='replacements')
@@ -221,7 +266,7 @@ class ContractDocument(models.Model):
         TERMINATION = 'termination', 'Termination'
         OTHER = 'other', 'Other'
     
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, db_default=RandomUUID(), editable=False)
     contract = models.ForeignKey(Contract, on_delete=models.CASCADE, related_name='additional_documents')
     
     document_type = models.CharField(max_length=20, choices=DocumentType.choices)
@@ -1,15 +1,35 @@
 from rest_framework import serializers
+from django.core.exceptions import ObjectDoesNotExist
 from django.utils import timezone
 from datetime import date, timedelta
-import json
+import copy
+import orjson
 
 from .models import Contract, ContractReplacement, ContractDocument
-from users.serializers.worker_serializers import WorkerProfileSerializer
-from users.serializers.employer_serializers import EmployerProfileSerializer
+from users.serializers import WorkerProfileSerializer, EmployerProfileSerializer
 from users.models import JobCategory
 
 
-class ContractSerializer(serializers.ModelSerializer):
+class CachedModelSerializer(serializers.ModelSerializer):
+    """
+    ModelSerializer that introspects its model once per class
+    
+    DRF rebuilds the model-derived fields on every instantiation. Here the
+    unbound fields are built once per serializer class and each instance
+    gets deep copies, the same way DRF copies declared fields, so nothing
+    bound to one request leaks into another.
+    """
+    
+    _fields_cache = {}
+    
+    def get_fields(self):
+        cls = type(self)
+        if cls not in self._fields_cache:
+            self._fields_cache[cls] = super().get_fields()
+        return {name: copy.deepcopy(field) for name, field in self._fields_cache[cls].items()}
+
+
+class ContractSerializer(CachedModelSerializer):
     """Serializer for Contract model"""
     
     worker_details = WorkerProfileSerializer(source='worker', read_only=True)
@@ -17,6 +37,7 @@ class ContractSerializer(serializers.ModelSerializer):
     category_name = serializers.CharField(source='category.name', read_only=True)
     
     # Read-only fields
+    total_monthly_cost = serializers.IntegerField(read_only=True)
     days_until_trial_end = serializers.IntegerField(read_only=True)
     is_active_trial = serializers.BooleanField(read_only=True)
     can_request_replacement = serializers.BooleanField(read_only=True)
@@ -45,6 +66,13 @@ class ContractSerializer(serializers.ModelSerializer):
             'employer_signature_date', 'worker_signature_date', 'created_by'
         ]
     
+    @classmethod
+    def prefetch_queryset(cls, queryset):
+        """Load the relations rendered by the nested serializers up front"""
+        return queryset.select_related(
+            'worker__user', 'employer__user', 'category'
+        ).prefetch_related('worker__skills__category')
+    
     def validate(self, data):
         """Validate contract data"""
         # Ensure worker salary is positive
@@ -59,20 +87,21 @@ class ContractSerializer(serializers.ModelSerializer):
                 'start_date': 'Start date must be today or in the future'
             })
         
-        # Validate work schedule JSON
-        if 'work_schedule' in data:
-            try:
-                if isinstance(data['work_schedule'], str):
-                    json.loads(data['work_schedule'])
-            except json.JSONDecodeError:
-                raise serializers.ValidationError({
-                    'work_schedule': 'Invalid JSON format for work schedule'
-                })
-        
         return data
     
+    def validate_work_schedule(self, value):
+        """Accept the schedule as an object or a JSON-encoded string"""
+        # Decode strings here so the stored value is always the object
+        if isinstance(value, str):
+            try:
+                value = orjson.loads(value)
+            except orjson.JSONDecodeError:
+                raise serializers.ValidationError('Invalid JSON format for work schedule')
+        return value
+    
     def create(self, validated_data):
         """Create contract with calculated service fee"""
+        from .services.contract_manager import ContractManager
         from .services.fee_calculator import FeeCalculator
         
         request = self.context.get('request')
@@ -84,7 +113,7 @@ class ContractSerializer(serializers.ModelSerializer):
             try:
                 employer_profile = request.user.employer_profile
                 validated_data['employer'] = employer_profile
-            except:
+            except ObjectDoesNotExist:
                 raise serializers.ValidationError({
                     'employer': 'User is not registered as an employer'
                 })
@@ -98,9 +127,6 @@ class ContractSerializer(serializers.ModelSerializer):
         )
         
         validated_data['service_fee_amount'] = service_fee
-        validated_data['total_monthly_cost'] = (
-            validated_data.get('worker_salary_amount', 0) + service_fee
-        )
         
         # Set trial end date
         if validated_data.get('start_date') and validated_data.get('trial_duration_days'):
@@ -113,13 +139,12 @@ class ContractSerializer(serializers.ModelSerializer):
         
         # Update worker availability
         if contract.worker:
-            contract.worker.availability = 'on_assignment'
-            contract.worker.save()
+            ContractManager._set_worker_availability(contract.worker, 'on_assignment')
         
         return contract
 
 
-class ContractCreateSerializer(serializers.ModelSerializer):
+class ContractCreateSerializer(CachedModelSerializer):
     """Simplified serializer for contract creation"""
     
     class Meta:
@@ -146,7 +171,8 @@ class ContractCreateSerializer(serializers.ModelSerializer):
 class ContractSignSerializer(serializers.Serializer):
     """Serializer for contract signing"""
     
-    signature_data = serializers.CharField(required=True)
+    # Base64-encoded signature image; capped so oversized payloads fail early
+    signature_data = serializers.CharField(required=True, max_length=1_500_000)
     agreed_to_terms = serializers.BooleanField(required=True)
     
     def validate_signature_data(self, value):
@@ -176,7 +202,7 @@ class TrialFeedbackSerializer(serializers.Serializer):
         return value
 
 
-class ReplacementRequestSerializer(serializers.ModelSerializer):
+class ReplacementRequestSerializer(CachedModelSerializer):
     """Serializer for replacement requests"""
     
     class Meta:
@@ -191,7 +217,7 @@ class ReplacementRequestSerializer(serializers.ModelSerializer):
         return value
 
 
-class ReplacementSerializer(serializers.ModelSerializer):
+class ReplacementSerializer(CachedModelSerializer):
     """Serializer for replacement records"""
     
     original_worker_details = WorkerProfileSerializer(source='original_worker', read_only=True)
@@ -211,9 +237,18 @@ class ReplacementSerializer(serializers.ModelSerializer):
             'id', 'requested_by', 'status', 'requested_at', 'completed_at',
             'replacement_cost'
         ]
+    
+    @classmethod
+    def prefetch_queryset(cls, queryset):
+        """Load the relations rendered by the nested serializers up front"""
+        return queryset.select_related(
+            'original_worker__user', 'replacement_worker__user', 'requested_by'
+        ).prefetch_related(
+            'original_worker__skills__category', 'replacement_worker__skills__category'
+        )
 
 
-class ContractDocumentSerializer(serializers.ModelSerializer):
+class ContractDocumentSerializer(CachedModelSerializer):
     """Serializer for contract documents"""
     
     uploaded_by_email = serializers.EmailField(source='uploaded_by.email', read_only=True)
@@ -225,6 +260,11 @@ class ContractDocumentSerializer(serializers.ModelSerializer):
             'uploaded_by', 'uploaded_by_email', 'uploaded_at', 'description'
         ]
         read_only_fields = ['id', 'uploaded_by', 'uploaded_at']
+    
+    @classmethod
+    def prefetch_queryset(cls, queryset):
+        """Load the relations rendered by the serializer up front"""
+        return queryset.select_related('uploaded_by')
 
 
 class ContractTerminationSerializer(serializers.Serializer):
@@ -1,6 +1,8 @@
+from django.db import transaction
 from django.utils import timezone
 from datetime import date, timedelta
 from contracts.models import Contract, ContractReplacement
+from users.models import WorkerProfile
 from payments.models import PayrollCycle, EmployerInvoice
 
 
@@ -18,7 +20,7 @@ class ContractManager:
         
         contract.status = Contract.ContractStatus.TRIAL
         contract.activated_at = timezone.now()
-        contract.save()
+        contract.save(update_fields=['status', 'activated_at', 'updated_at'])
         
         # Create initial payroll entry
         ContractManager._create_initial_payroll_entry(contract)
@@ -44,12 +46,14 @@ class ContractManager:
             contract.status = Contract.ContractStatus.TERMINATED
             contract.completed_at = timezone.now()
         
-        contract.save()
+        contract.save(update_fields=[
+            'is_trial', 'trial_passed', 'trial_feedback', 'status', 'completed_at', 'updated_at'
+        ])
         
         # Update worker stats if trial passed
         if passed and contract.worker:
             contract.worker.total_placements += 1
-            contract.worker.save()
+            contract.worker.save(update_fields=['total_placements', 'updated_at'])
         
         return contract
     
@@ -71,21 +75,34 @@ class ContractManager:
         
         # Update contract status
         contract.status = Contract.ContractStatus.TRIAL  # Keep in trial but mark for replacement
-        contract.save()
+        contract.save(update_fields=['status', 'updated_at'])
         
         return replacement
     
     @staticmethod
+    @transaction.atomic
     def approve_replacement(replacement, replacement_worker):
         """Approve replacement with new worker"""
+        # Lock the request, the worker and the contract being replaced, and
+        # re-read the state checked below so concurrent approvals serialize
+        replacement.status = ContractReplacement.objects.select_for_update().values_list(
+            'status', flat=True
+        ).get(pk=replacement.pk)
         if replacement.status != ContractReplacement.ReplacementStatus.REQUESTED:
             raise ValueError("Only requested replacements can be approved")
         
+        replacement_worker.availability = WorkerProfile.objects.select_for_update().values_list(
+            'availability', flat=True
+        ).get(pk=replacement_worker.pk)
         if replacement_worker.availability != 'available':
             raise ValueError("Replacement worker is not available")
         
+        original_contract = Contract.objects.select_for_update(of=('self',)).select_related(
+            'worker'
+        ).get(pk=replacement.original_contract_id)
+        replacement.original_contract = original_contract
+        
         # Create new contract with replacement worker
-        original_contract = replacement.original_contract
         new_contract = Contract.objects.create(
             employer=original_contract.employer,
             worker=replacement_worker,
@@ -103,22 +120,33 @@ class ContractManager:
             created_by=replacement.requested_by
         )
         
+        # The remaining writes go through bulk_update/update(), which skip
+        # save() and its signals, so timestamps are set here explicitly
+        now = timezone.now()
+        
         # Update replacement record
         replacement.replacement_worker = replacement_worker
         replacement.new_contract = new_contract
         replacement.status = ContractReplacement.ReplacementStatus.COMPLETED
-        replacement.completed_at = timezone.now()
-        replacement.save()
+        replacement.completed_at = now
+        ContractReplacement.objects.bulk_update(
+            [replacement], ['replacement_worker', 'new_contract', 'status', 'completed_at']
+        )
         
         # Terminate original contract
         original_contract.status = Contract.ContractStatus.TERMINATED
-        original_contract.completed_at = timezone.now()
+        original_contract.completed_at = now
+        original_contract.updated_at = now
         original_contract.termination_reason = f"Replaced by {replacement_worker.first_name} {replacement_worker.last_name}"
-        original_contract.save()
+        Contract.objects.bulk_update(
+            [original_contract], ['status', 'completed_at', 'termination_reason', 'updated_at']
+        )
         
-        # Update worker availability
-        replacement_worker.availability = 'on_assignment'
-        replacement_worker.save()
+        # Update worker availability; the post_save handler used to free the
+        # original worker, which bulk_update no longer triggers
+        if original_contract.worker:
+            ContractManager._set_worker_availability(original_contract.worker, 'available')
+        ContractManager._set_worker_availability(replacement_worker, 'on_assignment')
         
         return new_contract
     
@@ -132,18 +160,28 @@ class ContractManager:
         contract.termination_reason = reason
         contract.termination_initiated_by = terminated_by
         contract.completed_at = timezone.now()
-        contract.save()
+        contract.save(update_fields=[
+            'status', 'termination_reason', 'termination_initiated_by', 'completed_at', 'updated_at'
+        ])
         
         # Update worker availability
         if contract.worker:
-            contract.worker.availability = 'available'
-            contract.worker.save()
+            ContractManager._set_worker_availability(contract.worker, 'available')
         
         # Cancel any pending invoices
         ContractManager._cancel_pending_invoices(contract)
         
         return contract
     
+    @staticmethod
+    def _set_worker_availability(worker, availability):
+        """Set a worker's availability with a single UPDATE, skipping save() and its signals"""
+        worker.availability = availability
+        WorkerProfile.objects.filter(pk=worker.pk).update(
+            availability=availability,
+            updated_at=timezone.now()
+        )
+    
     @staticmethod
     def _create_initial_payroll_entry(contract):
         """Create initial payroll entry for contract"""
@@ -161,23 +199,32 @@ class ContractManager:
         """Check and handle expired trial periods"""
         today = date.today()
         
-        # Find contracts with expired trials
-        expired_trials = Contract.objects.filter(
-            status=Contract.ContractStatus.TRIAL,
-            trial_end_date__lt=today,
-            trial_passed__isnull=True
-        )
-        
-        for contract in expired_trials:
-            # Auto-complete trial as failed if no action taken
-            contract.is_trial = False
-            contract.trial_passed = False
-            contract.status = Contract.ContractStatus.TERMINATED
-            contract.completed_at = timezone.now()
-            contract.trial_feedback = "Trial expired automatically - no feedback provided"
-            contract.save()
+        with transaction.atomic():
+            # Find contracts with expired trials, locking them until updated
+            expired_trials = list(Contract.objects.select_for_update().filter(
+                status=Contract.ContractStatus.TRIAL,
+                trial_end_date__lt=today,
+                trial_passed__isnull=True
+            ).values_list('id', 'worker_id'))
+            
+            if not expired_trials:
+                return 0
+            
+            # Auto-complete trials as failed if no action taken
+            Contract.objects.filter(
+                id__in=[contract_id for contract_id, _ in expired_trials]
+            ).update(
+                is_trial=False,
+                trial_passed=False,
+                status=Contract.ContractStatus.TERMINATED,
+                completed_at=timezone.now(),
+                trial_feedback="Trial expired automatically - no feedback provided",
+                updated_at=timezone.now()
+            )
             
             # Update worker availability
-            if contract.worker:
-                contract.worker.availability = 'available'
-                contract.worker.save()
+            WorkerProfile.objects.filter(
+                id__in={worker_id for _, worker_id in expired_trials if worker_id}
+            ).update(availability='available', updated_at=timezone.now())
+        
+        return len(expired_trials)
@@ -1,35 +1,179 @@
+import hashlib
+import logging
 import os
+import shutil
+import time
 from io import BytesIO
 from datetime import datetime
-from django.template.loader import render_to_string
+from functools import lru_cache
 from django.conf import settings
+from django.core.cache import cache
 from django.utils import timezone
 from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import letter
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
 from reportlab.lib.units import inch
+from reportlab.lib.utils import simpleSplit
 from reportlab.lib import colors
 import boto3
 from botocore.exceptions import ClientError
 
+from contracts.models import Contract
+
+logger = logging.getLogger(__name__)
+
+
+PAGE_WIDTH, PAGE_HEIGHT = letter
+MARGIN = inch
+CONTENT_WIDTH = PAGE_WIDTH - 2 * MARGIN
+LABEL_WIDTH = 2 * inch
+
+FONT = 'Helvetica'
+BOLD_FONT = 'Helvetica-Bold'
+FONT_SIZE = 10
+LEADING = 12
+
+# Vertical padding above and below each label/value row
+DETAILS_PADDING = 6
+ROW_PADDING = 4
+SIGNATURE_PADDING = 10
+
+# Relations read while drawing the PDF
+PDF_RELATED = ('employer__user', 'worker__user')
+
+# Everything rendered into the PDF. The stored document is reused while the
+# hash of these values is unchanged; bump the version when the layout changes
+DOCUMENT_LAYOUT_VERSION = 1
+HASHED_FIELDS = (
+    'id', 'job_title', 'contract_type', 'status', 'worker_salary_amount',
+    'service_fee_amount', 'total_monthly_cost', 'payment_frequency', 'start_date',
+    'trial_end_date', 'trial_duration_days', 'end_date', 'work_location',
+    'work_hours_per_week', 'work_schedule'
+)
+EMPLOYER_HASHED_FIELDS = ('first_name', 'last_name', 'company_name', 'address')
+WORKER_HASHED_FIELDS = ('first_name', 'last_name', 'national_id', 'city', 'district')
+
+# Fixed contract text, numbered when drawn
+_TERMS = tuple(f"{i}. {term}" for i, term in enumerate((
+    "This contract is governed by the laws of Uganda.",
+    "Either party may terminate this contract with 30 days written notice.",
+    "During the trial period, either party may terminate immediately without penalty.",
+    "Worker salary is paid through WorkConnect Uganda's payroll system.",
+    "The employer is responsible for providing a safe working environment.",
+    "All disputes shall be resolved through arbitration in Kampala.",
+), 1))
+
+SIGNATURE_LINE = "_________________________"
+
+
+class _PdfWriter:
+    """
+    Lays text out top to bottom directly on a canvas
+    
+    The contract has a fixed shape, so lines are placed by a running y
+    position instead of going through Platypus flowables; a new page is
+    started whenever the next element doesn't fit.
+    """
+    
+    def __init__(self, buffer):
+        self.canvas = canvas.Canvas(buffer, pagesize=letter)
+        self.y = PAGE_HEIGHT - MARGIN
+    
+    def _make_room(self, height):
+        if self.y - height < MARGIN:
+            self.canvas.showPage()
+            self.y = PAGE_HEIGHT - MARGIN
+    
+    def space(self, height):
+        self.y -= height
+    
+    def title(self, text):
+        self._make_room(19)
+        self.canvas.setFont(BOLD_FONT, 16)
+        self.canvas.drawCentredString(PAGE_WIDTH / 2, self.y - 16, text)
+        self.y -= 19 + 12
+    
+    def heading(self, text):
+        self._make_room(LEADING + 2)
+        self.canvas.setFont(BOLD_FONT, 12)
+        self.canvas.drawString(MARGIN, self.y - 12, text)
+        self.y -= LEADING + 2 + 6
+    
+    def text(self, text):
+        """A paragraph, wrapped to the content width"""
+        self.canvas.setFont(FONT, FONT_SIZE)
+        for line in simpleSplit(text, FONT, FONT_SIZE, CONTENT_WIDTH) or ['']:
+            self._make_room(LEADING)
+            self.canvas.drawString(MARGIN, self.y - FONT_SIZE, line)
+            self.y -= LEADING
+        self.y -= 6
+    
+    def rows(self, rows, padding=ROW_PADDING):
+        """Label/value pairs in two columns"""
+        height = FONT_SIZE + 2 * padding
+        self.canvas.setFont(FONT, FONT_SIZE)
+        for label, value in rows:
+            self._make_room(height)
+            baseline = self.y - padding - FONT_SIZE
+            self.canvas.drawString(MARGIN, baseline, label)
+            self.canvas.drawString(MARGIN + LABEL_WIDTH, baseline, str(value))
+            self.y -= height
+    
+    def finish(self):
+        self.canvas.showPage()
+        self.canvas.save()
+
+
+@lru_cache(maxsize=1)
+def get_s3_client():
+    """Shared S3 client; clients are thread-safe and keep their connection pool"""
+    return boto3.client(
+        's3',
+        aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+        aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+        region_name=settings.AWS_S3_REGION_NAME
+    )
+
+
+def _related_loaded(contract):
+    """Whether the employer, the worker and their users are already loaded"""
+    for name in ('employer', 'worker'):
+        if not Contract._meta.get_field(name).is_cached(contract):
+            return False
+        party = getattr(contract, name)
+        if party is not None and not party._meta.get_field('user').is_cached(party):
+            return False
+    return True
+
+
+def _document_hash(contract):
+    """Hash of the values rendered into the contract PDF"""
+    values = [DOCUMENT_LAYOUT_VERSION]
+    values += [getattr(contract, field) for field in HASHED_FIELDS]
+    for party, fields in ((contract.employer, EMPLOYER_HASHED_FIELDS),
+                          (contract.worker, WORKER_HASHED_FIELDS)):
+        values += [getattr(party, field) for field in fields]
+        values += [party.user.phone, party.user.email]
+    return hashlib.blake2b(repr(tuple(values)).encode(), digest_size=16).hexdigest()
+
 
 class ContractDocumentGenerator:
     """Generate PDF contract documents"""
     
     def __init__(self, contract):
         self.contract = contract
-        self.s3_client = None
-        if settings.USE_S3:
-            self.s3_client = boto3.client(
-                's3',
-                aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-                aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-                region_name=settings.AWS_S3_REGION_NAME
-            )
     
     def generate(self):
         """Generate PDF contract and upload to storage"""
+        # One joined query for everything the PDF reads, unless the caller
+        # already fetched the contract that way
+        if not _related_loaded(self.contract):
+            self.contract = Contract.objects.select_related(*PDF_RELATED).get(pk=self.contract.pk)
+        
+        # Nothing rendered has changed since the last document; keep it
+        document_hash = _document_hash(self.contract)
+        if self.contract.contract_document_url and self.contract.contract_document_hash == document_hash:
+            return self.contract.contract_document_url
+        
         # Create PDF
         pdf_buffer = self._create_pdf()
         
@@ -37,280 +181,208 @@ class ContractDocumentGenerator:
         filename = f"contract_{self.contract.id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
         
         # Upload to storage
-        if settings.USE_S3 and self.s3_client:
+        if settings.USE_S3:
             file_url = self._upload_to_s3(pdf_buffer, filename)
         else:
             file_url = self._save_locally(pdf_buffer, filename)
         
         # Update contract with document URL
         self.contract.contract_document_url = file_url
-        self.contract.save(update_fields=['contract_document_url'])
+        self.contract.contract_document_hash = document_hash
+        self.contract.save(update_fields=[
+            'contract_document_url', 'contract_document_key', 'contract_document_hash'
+        ])
         
         return file_url
     
     def _create_pdf(self):
         """Create PDF document"""
         buffer = BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=letter)
-        styles = getSampleStyleSheet()
-        
-        # Custom styles
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=16,
-            spaceAfter=12,
-            alignment=1  # Center
-        )
+        pdf = _PdfWriter(buffer)
         
-        heading_style = ParagraphStyle(
-            'CustomHeading',
-            parent=styles['Heading2'],
-            fontSize=12,
-            spaceAfter=6
-        )
-        
-        normal_style = ParagraphStyle(
-            'CustomNormal',
-            parent=styles['Normal'],
-            fontSize=10,
-            spaceAfter=6
-        )
-        
-        # Build document
-        story = []
+        # Values used more than once, or pulled through several attributes
+        contract = self.contract
+        employer = contract.employer
+        worker = contract.worker
+        employer_name = f"{employer.first_name} {employer.last_name}"
+        worker_name = f"{worker.first_name} {worker.last_name}"
         
         # Title
-        story.append(Paragraph("WORK CONNECT UGANDA", title_style))
-        story.append(Paragraph("EMPLOYMENT CONTRACT", title_style))
-        story.append(Spacer(1, 20))
+        pdf.title("WORK CONNECT UGANDA")
+        pdf.title("EMPLOYMENT CONTRACT")
+        pdf.space(20)
         
         # Contract Details
-        story.append(Paragraph("1. CONTRACT DETAILS", heading_style))
-        
-        details_data = [
-            ["Contract ID:", str(self.contract.id)],
-            ["Job Title:", self.contract.job_title],
-            ["Contract Type:", self.contract.get_contract_type_display()],
-            ["Status:", self.contract.get_status_display()],
-        ]
-        
-        details_table = Table(details_data, colWidths=[2*inch, 4*inch])
-        details_table.setStyle(TableStyle([
-            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-            ('TOPPADDING', (0, 0), (-1, -1), 6),
-        ]))
-        story.append(details_table)
-        story.append(Spacer(1, 12))
+        pdf.heading("1. CONTRACT DETAILS")
+        pdf.rows([
+            ["Contract ID:", str(contract.id)],
+            ["Job Title:", contract.job_title],
+            ["Contract Type:", contract.get_contract_type_display()],
+            ["Status:", contract.get_status_display()],
+        ], padding=DETAILS_PADDING)
+        pdf.space(12)
         
         # Parties
-        story.append(Paragraph("2. PARTIES", heading_style))
-        
-        employer = self.contract.employer
-        worker = self.contract.worker
+        pdf.heading("2. PARTIES")
         
-        parties_data = [
-            ["Employer:", f"{employer.first_name} {employer.last_name}"],
+        pdf.rows([
+            ["Employer:", employer_name],
             ["Company:", employer.company_name or "Individual"],
             ["Address:", employer.address or "Not specified"],
             ["Phone:", employer.user.phone],
             ["Email:", employer.user.email],
             ["", ""],
-            ["Worker:", f"{worker.first_name} {worker.last_name}"],
+            ["Worker:", worker_name],
             ["ID Number:", worker.national_id or "Not provided"],
             ["Address:", f"{worker.city}, {worker.district or ''}"],
             ["Phone:", worker.user.phone],
             ["Email:", worker.user.email],
-        ]
-        
-        parties_table = Table(parties_data, colWidths=[2*inch, 4*inch])
-        parties_table.setStyle(TableStyle([
-            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
-            ('TOPPADDING', (0, 0), (-1, -1), 4),
-        ]))
-        story.append(parties_table)
-        story.append(Spacer(1, 12))
+        ])
+        pdf.space(12)
         
         # Financial Terms
-        story.append(Paragraph("3. FINANCIAL TERMS", heading_style))
-        
-        financial_data = [
-            ["Worker Salary:", f"UGX {self.contract.worker_salary_amount:,} per month"],
-            ["Service Fee:", f"UGX {self.contract.service_fee_amount:,} per month"],
-            ["Total Monthly Cost:", f"UGX {self.contract.total_monthly_cost:,} per month"],
-            ["Payment Frequency:", self.contract.payment_frequency.title()],
-        ]
-        
-        financial_table = Table(financial_data, colWidths=[2*inch, 4*inch])
-        financial_table.setStyle(TableStyle([
-            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
-            ('TOPPADDING', (0, 0), (-1, -1), 4),
-        ]))
-        story.append(financial_table)
-        story.append(Spacer(1, 12))
+        pdf.heading("3. FINANCIAL TERMS")
+        pdf.rows([
+            ["Worker Salary:", f"UGX {contract.worker_salary_amount:,} per month"],
+            ["Service Fee:", f"UGX {contract.service_fee_amount:,} per month"],
+            ["Total Monthly Cost:", f"UGX {contract.total_monthly_cost:,} per month"],
+            ["Payment Frequency:", contract.payment_frequency.title()],
+        ])
+        pdf.space(12)
         
         # Contract Dates
-        story.append(Paragraph("4. CONTRACT DATES", heading_style))
-        
-        dates_data = [
-            ["Start Date:", self.contract.start_date.strftime("%B %d, %Y")],
-            ["Trial End Date:", self.contract.trial_end_date.strftime("%B %d, %Y") if self.contract.trial_end_date else "N/A"],
-            ["Trial Duration:", f"{self.contract.trial_duration_days} days"],
-            ["End Date:", self.contract.end_date.strftime("%B %d, %Y") if self.contract.end_date else "Open-ended"],
-        ]
-        
-        dates_table = Table(dates_data, colWidths=[2*inch, 4*inch])
-        dates_table.setStyle(TableStyle([
-            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
-            ('TOPPADDING', (0, 0), (-1, -1), 4),
-        ]))
-        story.append(dates_table)
-        story.append(Spacer(1, 12))
+        pdf.heading("4. CONTRACT DATES")
+        pdf.rows([
+            ["Start Date:", contract.start_date.strftime("%B %d, %Y")],
+            ["Trial End Date:", contract.trial_end_date.strftime("%B %d, %Y") if contract.trial_end_date else "N/A"],
+            ["Trial Duration:", f"{contract.trial_duration_days} days"],
+            ["End Date:", contract.end_date.strftime("%B %d, %Y") if contract.end_date else "Open-ended"],
+        ])
+        pdf.space(12)
         
         # Work Details
-        story.append(Paragraph("5. WORK DETAILS", heading_style))
-        story.append(Paragraph(f"Work Location: {self.contract.work_location or 'Not specified'}", normal_style))
-        story.append(Paragraph(f"Work Hours per Week: {self.contract.work_hours_per_week} hours", normal_style))
-        
-        # Work Schedule
-        if self.contract.work_schedule:
-            story.append(Paragraph("Work Schedule:", normal_style))
-            try:
-                schedule = self.contract.work_schedule
-                if isinstance(schedule, str):
-                    import json
-                    schedule = json.loads(schedule)
-                
-                for day, time in schedule.items():
-                    story.append(Paragraph(f"  {day.title()}: {time}", normal_style))
-            except:
-                story.append(Paragraph("  Schedule details available in digital format", normal_style))
-        
-        story.append(Spacer(1, 12))
+        pdf.heading("5. WORK DETAILS")
+        pdf.text(f"Work Location: {contract.work_location or 'Not specified'}")
+        pdf.text(f"Work Hours per Week: {contract.work_hours_per_week} hours")
+        
+        # Work Schedule (JSONField, already decoded)
+        schedule = contract.work_schedule
+        if schedule:
+            pdf.text("Work Schedule:")
+            if isinstance(schedule, dict):
+                for day, hours in schedule.items():
+                    pdf.text(f"  {day.title()}: {hours}")
+            else:
+                pdf.text("  Schedule details available in digital format")
+        
+        pdf.space(12)
         
         # Terms and Conditions
-        story.append(Paragraph("6. TERMS AND CONDITIONS", heading_style))
+        pdf.heading("6. TERMS AND CONDITIONS")
         
-        terms = [
-            "This contract is governed by the laws of Uganda.",
-            "Either party may terminate this contract with 30 days written notice.",
-            "During the trial period, either party may terminate immediately without penalty.",
-            "Worker salary is paid through WorkConnect Uganda's payroll system.",
-            "The employer is responsible for providing a safe working environment.",
-            "All disputes shall be resolved through arbitration in Kampala.",
-        ]
+        for term in _TERMS:
+            pdf.text(term)
         
-        for i, term in enumerate(terms, 1):
-            story.append(Paragraph(f"{i}. {term}", normal_style))
-        
-        story.append(Spacer(1, 20))
+        pdf.space(20)
         
         # Signature Blocks
-        story.append(Paragraph("SIGNATURES", heading_style))
-        story.append(Spacer(1, 30))
+        pdf.heading("SIGNATURES")
+        pdf.space(30)
         
         # Employer Signature
-        employer_signature = [
-            ["Employer Signature:", "_________________________"],
-            ["Name:", f"{employer.first_name} {employer.last_name}"],
-            ["Date:", "_________________________"],
-        ]
-        
-        employer_table = Table(employer_signature, colWidths=[2*inch, 4*inch])
-        employer_table.setStyle(TableStyle([
-            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
-            ('TOPPADDING', (0, 0), (-1, -1), 10),
-        ]))
-        story.append(employer_table)
-        story.append(Spacer(1, 40))
+        pdf.rows((
+            ("Employer Signature:", SIGNATURE_LINE),
+            ("Name:", employer_name),
+            ("Date:", SIGNATURE_LINE),
+        ), padding=SIGNATURE_PADDING)
+        pdf.space(40)
         
         # Worker Signature
-        worker_signature = [
-            ["Worker Signature:", "_________________________"],
-            ["Name:", f"{worker.first_name} {worker.last_name}"],
-            ["Date:", "_________________________"],
-        ]
-        
-        worker_table = Table(worker_signature, colWidths=[2*inch, 4*inch])
-        worker_table.setStyle(TableStyle([
-            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
-            ('TOPPADDING', (0, 0), (-1, -1), 10),
-        ]))
-        story.append(worker_table)
+        pdf.rows((
+            ("Worker Signature:", SIGNATURE_LINE),
+            ("Name:", worker_name),
+            ("Date:", SIGNATURE_LINE),
+        ), padding=SIGNATURE_PADDING)
         
         # Generate PDF
-        doc.build(story)
+        pdf.finish()
         
         buffer.seek(0)
-        return buffer.getvalue()
+        return buffer
     
-    def _upload_to_s3(self, file_content, filename):
+    def _upload_to_s3(self, file_obj, filename):
         """Upload file to AWS S3"""
         try:
             folder = f"contracts/{self.contract.id}"
             key = f"{folder}/{filename}"
             
-            self.s3_client.put_object(
-                Bucket=settings.AWS_STORAGE_BUCKET_NAME,
-                Key=key,
-                Body=file_content,
-                ContentType='application/pdf',
-                ACL='private'
+            get_s3_client().upload_fileobj(
+                file_obj,
+                settings.AWS_STORAGE_BUCKET_NAME,
+                key,
+                ExtraArgs={'ContentType': 'application/pdf', 'ACL': 'private'}
             )
+            self.contract.contract_document_key = key
             
             # Generate URL
             file_url = f"https://{settings.AWS_S3_CUSTOM_DOMAIN}/{key}"
             return file_url
             
-        except ClientError as e:
-            print(f"Error uploading to S3: {e}")
+        except ClientError:
+            logger.exception("S3 upload failed for contract %s", self.contract.id)
             raise
     
-    def _save_locally(self, file_content, filename):
+    def _save_locally(self, file_obj, filename):
         """Save file locally (for development)"""
         contracts_dir = os.path.join(settings.MEDIA_ROOT, 'contracts', str(self.contract.id))
         os.makedirs(contracts_dir, exist_ok=True)
         
         filepath = os.path.join(contracts_dir, filename)
         with open(filepath, 'wb') as f:
-            f.write(file_content)
+            shutil.copyfileobj(file_obj, f)
         
+        self.contract.contract_document_key = None
         return f"/media/contracts/{self.contract.id}/{filename}"
     
     def get_signed_url(self, expires_in=3600):
         """Get signed URL for document (expires in specified seconds)"""
+        return self.get_signed_url_with_expiry(expires_in)[0]
+    
+    def get_signed_url_with_expiry(self, expires_in=3600):
+        """
+        Signed URL for the document and the seconds it stays valid
+        
+        Returns (None, 0) when there is no S3 document or signing fails.
+        """
         if not self.contract.contract_document_url or not settings.USE_S3:
-            return None
+            return None, 0
         
         try:
-            # Extract key from URL
-            url = self.contract.contract_document_url
-            key = url.split(f"{settings.AWS_S3_CUSTOM_DOMAIN}/")[1]
+            # Documents uploaded before the key was stored only have the URL
+            key = self.contract.contract_document_key or \
+                self.contract.contract_document_url.split(f"{settings.AWS_S3_CUSTOM_DOMAIN}/")[1]
             
-            # Generate signed URL
-            signed_url = self.s3_client.generate_presigned_url(
-                'get_object',
-                Params={
-                    'Bucket': settings.AWS_STORAGE_BUCKET_NAME,
-                    'Key': key
-                },
-                ExpiresIn=expires_in
-            )
+            # Reuse a signature while it still has at least half its lifetime
+            # left; the key changes whenever the document is regenerated.
+            # Version 2 entries hold (url, expires_at) rather than the bare URL
+            cache_key = f"s3sign:{key}:{expires_in}"
+            cached = cache.get(cache_key, version=2)
+            if cached is None:
+                signed_url = get_s3_client().generate_presigned_url(
+                    'get_object',
+                    Params={
+                        'Bucket': settings.AWS_STORAGE_BUCKET_NAME,
+                        'Key': key
+                    },
+                    ExpiresIn=expires_in
+                )
+                expires_at = time.time() + expires_in
+                cache.set(cache_key, (signed_url, expires_at), timeout=expires_in // 2, version=2)
+            else:
+                signed_url, expires_at = cached
             
-            return signed_url
+            return signed_url, max(int(expires_at - time.time()), 0)
             
-        except Exception as e:
-            print(f"Error generating signed URL: {e}")
-            return None
+        except Exception:
+            logger.exception("Could not sign document URL for contract %s", self.contract.id)
+            return None, 0
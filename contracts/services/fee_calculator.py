@@ -1,7 +1,25 @@
-from decimal import Decimal
+import json
+import logging
+from django.core.cache import cache
 from django.utils import timezone
 from payments.models import ServiceFeeConfig
 
+logger = logging.getLogger(__name__)
+
+# Seconds a category's fee configuration is reused before it is read again
+FEE_CONFIG_CACHE_TTL = 300
+# Bump when the shape of the cached config dict changes
+FEE_CONFIG_CACHE_VERSION = 2
+
+
+def _fee_config_key(category_id, day):
+    return f"feecfg:{category_id}:{day.isoformat()}"
+
+
+def invalidate_fee_config_cache(category_id):
+    """Drop the cached fee configuration of a category after it changes"""
+    cache.delete(_fee_config_key(category_id, timezone.now().date()), version=FEE_CONFIG_CACHE_VERSION)
+
 
 class FeeCalculator:
     """Calculate service fees based on configuration"""
@@ -18,72 +36,109 @@ class FeeCalculator:
         Returns:
             Service fee amount in UGX
         """
+        config = FeeCalculator.get_fee_config(category_id)
+        
+        if not config:
+            # Default fee: 25% of first month's salary, with minimum 100,000 UGX
+            default_fee = worker_salary * 25 // 100
+            return max(default_fee, 100000)
+        
+        fee = 0
+        
+        if config['fee_type'] == ServiceFeeConfig.FeeCalculationType.FIXED_AMOUNT:
+            fee = config['fixed_amount'] or 0
+            
+        elif config['fee_type'] == ServiceFeeConfig.FeeCalculationType.PERCENTAGE:
+            # Whole UGX, truncated, from the rate in basis points
+            fee = worker_salary * config['percentage_bp'] // 10000
+            
+        elif config['fee_type'] == ServiceFeeConfig.FeeCalculationType.TIERED:
+            fee = FeeCalculator._calculate_tiered_fee(config['tiers'], worker_salary)
+        
+        # Apply minimum and maximum limits
+        if config['minimum_fee'] and fee < config['minimum_fee']:
+            fee = config['minimum_fee']
+        
+        if config['maximum_fee'] and fee > config['maximum_fee']:
+            fee = config['maximum_fee']
+        
+        return fee
+    
+    @staticmethod
+    def get_fee_config(category_id):
+        """
+        Active fee configuration for a category, cached per day
+        
+        Returns a plain dict with the tiers already parsed, or an empty dict
+        when the category has no active configuration.
+        """
+        today = timezone.now().date()
+        return cache.get_or_set(
+            _fee_config_key(category_id, today),
+            lambda: FeeCalculator._load_fee_config(category_id, today),
+            FEE_CONFIG_CACHE_TTL,
+            version=FEE_CONFIG_CACHE_VERSION
+        )
+    
+    @staticmethod
+    def _load_fee_config(category_id, day):
         try:
             # Get active fee configuration for category
             config = ServiceFeeConfig.objects.get(
                 category_id=category_id,
                 is_active=True,
-                effective_from__lte=timezone.now().date()
+                effective_from__lte=day
             )
-            
-            fee = 0
-            
-            if config.fee_type == ServiceFeeConfig.FeeCalculationType.FIXED_AMOUNT:
-                fee = config.fixed_amount or 0
-                
-            elif config.fee_type == ServiceFeeConfig.FeeCalculationType.PERCENTAGE:
-                if config.percentage:
-                    fee = int(worker_salary * (Decimal(config.percentage) / Decimal(100)))
-                else:
-                    fee = 0
-                
-            elif config.fee_type == ServiceFeeConfig.FeeCalculationType.TIERED:
-                fee = FeeCalculator._calculate_tiered_fee(config.tier_config, worker_salary)
-            
-            # Apply minimum and maximum limits
-            if config.minimum_fee and fee < config.minimum_fee:
-                fee = config.minimum_fee
-            
-            if config.maximum_fee and fee > config.maximum_fee:
-                fee = config.maximum_fee
-            
-            return fee
-            
         except ServiceFeeConfig.DoesNotExist:
-            # Default fee: 25% of first month's salary, with minimum 100,000 UGX
-            default_fee = int(worker_salary * 0.25)
-            return max(default_fee, 100000)
+            return {}
+        
+        tiers = None
+        if config.fee_type == ServiceFeeConfig.FeeCalculationType.TIERED:
+            tiers = FeeCalculator._parse_tiers(config.tier_config)
+        
+        return {
+            'fee_type': config.fee_type,
+            'fixed_amount': config.fixed_amount,
+            'percentage_bp': int(config.percentage * 100) if config.percentage else 0,
+            'tiers': tiers,
+            'minimum_fee': config.minimum_fee,
+            'maximum_fee': config.maximum_fee,
+        }
     
     @staticmethod
-    def _calculate_tiered_fee(tier_config, salary):
-        """Calculate fee based on salary tiers"""
+    def _parse_tiers(tier_config):
+        """Tier config as (min, max, fee) tuples, None if it can't be parsed"""
         if not tier_config:
-            return 0
+            return []
         
         try:
             # Parse tier config if it's a string
             if isinstance(tier_config, str):
-                import json
-                tiers = json.loads(tier_config)
-            else:
-                tiers = tier_config
-            
-            # Find appropriate tier
-            for tier in tiers:
-                min_salary = tier.get('min', 0)
-                max_salary = tier.get('max', float('inf'))
-                fee = tier.get('fee', 0)
-                
-                if min_salary <= salary <= max_salary:
-                    return fee
+                tier_config = json.loads(tier_config)
             
-            # If salary exceeds all tiers, use highest tier fee
-            if tiers:
-                return tiers[-1].get('fee', 0)
+            return [
+                (tier.get('min', 0), tier.get('max', float('inf')), tier.get('fee', 0))
+                for tier in tier_config
+            ]
             
-            return 0
-            
-        except Exception as e:
-            print(f"Error calculating tiered fee: {e}")
+        except Exception:
+            logger.exception("Error parsing fee tier config")
+            return None
+    
+    @staticmethod
+    def _calculate_tiered_fee(tiers, salary):
+        """Calculate fee based on salary tiers"""
+        if tiers is None:
             # Fallback to default calculation
-            return int(salary * 0.25)
+            return salary * 25 // 100
+        
+        # Find appropriate tier
+        for min_salary, max_salary, fee in tiers:
+            if min_salary <= salary <= max_salary:
+                return fee
+        
+        # If salary exceeds all tiers, use highest tier fee
+        if tiers:
+            return tiers[-1][2]
+        
+        return 0
@@ -1,15 +1,31 @@
-from django.db.models.signals import post_save, pre_save
+from datetime import date
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
+from django.utils import timezone
 from .models import Contract
+from .services.contract_manager import ContractManager
+from .services.fee_calculator import invalidate_fee_config_cache
 from notifications.tasks import send_contract_status_notification
+from payments.models import ServiceFeeConfig
 
 
 @receiver(pre_save, sender=Contract)
 def update_contract_status(sender, instance, **kwargs):
     """Update contract status and related fields before saving"""
+    # Remember the stored status so post_save can tell whether it changed;
+    # saves that don't write the status column can't change it
+    update_fields = kwargs.get('update_fields')
+    if instance._state.adding or (update_fields is not None and 'status' not in update_fields):
+        instance._old_status = None
+    else:
+        instance._old_status = Contract.objects.filter(pk=instance.pk).values_list(
+            'status', flat=True
+        ).first()
+    
     # Auto-activate if both parties have signed and start date has arrived
-    if (instance.signed_by_employer and instance.signed_by_worker and 
-        instance.status == Contract.ContractStatus.DRAFT and 
+    if (instance.signed_by_employer and instance.signed_by_worker and
+        instance.status == Contract.ContractStatus.DRAFT and
         instance.start_date <= date.today()):
         instance.status = Contract.ContractStatus.TRIAL
         if not instance.activated_at:
@@ -19,25 +35,35 @@ def update_contract_status(sender, instance, **kwargs):
 @receiver(post_save, sender=Contract)
 def handle_contract_status_change(sender, instance, created, **kwargs):
     """Handle contract status changes"""
-    if not created:
-        # Check if status changed
-        try:
-            old_instance = Contract.objects.get(id=instance.id)
-            if old_instance.status != instance.status:
-                # Send notification for status change
-                send_contract_status_notification.delay(
-                    instance.id,
-                    old_instance.status,
-                    instance.status
-                )
-        except Contract.DoesNotExist:
-            pass
+    old_status = instance.__dict__.pop('_old_status', None)
+    if old_status and old_status != instance.status:
+        # Send notification for status change to both parties
+        user_ids = [
+            party.user_id for party in (instance.employer, instance.worker) if party
+        ]
+        contract_id, new_status = str(instance.id), instance.status
+        
+        def notify():
+            for user_id in user_ids:
+                send_contract_status_notification.delay(contract_id, new_status, str(user_id))
+        
+        transaction.on_commit(notify)
     
-    # Update worker availability
+    # Update worker availability, skipping the write when it already matches
     if instance.worker:
         if instance.status in [Contract.ContractStatus.ACTIVE, Contract.ContractStatus.TRIAL]:
-            instance.worker.availability = 'on_assignment'
-        elif instance.status in [Contract.ContractStatus.COMPLETED, Contract.ContractStatus.TERMINATED, 
-                                Contract.ContractStatus.CANCELLED]:
-            instance.worker.availability = 'available'
-        instance.worker.save(update_fields=['availability'])
+            availability = 'on_assignment'
+        elif instance.status in [Contract.ContractStatus.COMPLETED, Contract.ContractStatus.TERMINATED,
+                                 Contract.ContractStatus.CANCELLED]:
+            availability = 'available'
+        else:
+            availability = instance.worker.availability
+        
+        if instance.worker.availability != availability:
+            ContractManager._set_worker_availability(instance.worker, availability)
+
+
+@receiver([post_save, post_delete], sender=ServiceFeeConfig)
+def clear_fee_config_cache(sender, instance, **kwargs):
+    """Stop serving a cached fee configuration once it changes"""
+    invalidate_fee_config_cache(instance.category_id)
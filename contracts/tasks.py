@@ -1,9 +1,16 @@
+import logging
 from celery import shared_task
 from django.utils import timezone
 from datetime import date, timedelta
 from .models import Contract
 from .services.contract_manager import ContractManager
-from notifications.tasks import send_trial_reminder_notification
+from .services.document_generator import ContractDocumentGenerator, PDF_RELATED
+from notifications.tasks import send_trial_period_reminder
+
+logger = logging.getLogger(__name__)
+
+# Trial reminders sent per broker message
+REMINDER_BATCH_SIZE = 100
 
 
 @shared_task
@@ -20,38 +27,31 @@ def send_trial_reminders():
     reminder_date = today + timedelta(days=2)  # 2 days before trial ends
     
     # Find contracts with trials ending in 2 days
-    expiring_trials = Contract.objects.filter(
+    contract_ids = Contract.objects.filter(
         status=Contract.ContractStatus.TRIAL,
         trial_end_date=reminder_date,
         trial_passed__isnull=True
-    )
+    ).values_list('id', flat=True)
+    
+    # One reminder per contract covers both parties; batch them so the
+    # broker gets one message per REMINDER_BATCH_SIZE contracts
+    reminders = [(str(contract_id), 2) for contract_id in contract_ids]  # 2 days remaining
+    if reminders:
+        send_trial_period_reminder.chunks(reminders, REMINDER_BATCH_SIZE).apply_async()
     
-    for contract in expiring_trials:
-        # Send reminder to employer
-        send_trial_reminder_notification.delay(
-            contract.employer.user.id,
-            contract.id,
-            'employer',
-            2  # days remaining
-        )
-        
-        # Send reminder to worker
-        send_trial_reminder_notification.delay(
-            contract.worker.user.id,
-            contract.id,
-            'worker',
-            2  # days remaining
-        )
+    return {"success": True, "reminders": len(reminders)}
 
 
 @shared_task
 def generate_contract_document(contract_id):
     """Generate contract document asynchronously"""
     try:
-        contract = Contract.objects.get(id=contract_id)
+        contract = Contract.objects.select_related(*PDF_RELATED).get(id=contract_id)
         generator = ContractDocumentGenerator(contract)
-        generator.generate()
+        file_url = generator.generate()
+        return {"success": True, "contract_document_url": file_url}
     except Contract.DoesNotExist:
-        pass
+        return {"success": False, "error": "Contract not found"}
     except Exception as e:
-        print(f"Error generating contract document: {e}")
+        logger.exception("Error generating contract document for %s", contract_id)
+        return {"success": False, "error": str(e)}
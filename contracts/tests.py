@@ -1 +1,316 @@
+# contracts/tests.py
+from datetime import date
+from decimal import Decimal
+from unittest import mock
+from django.core.cache import cache
+from django.db import transaction
+from django.test import TestCase
+from rest_framework.test import APIRequestFactory, force_authenticate
+from contracts.models import Contract, ContractReplacement
+from contracts.services.contract_manager import ContractManager
+from contracts.services.fee_calculator import FeeCalculator
+from contracts.views import ContractViewSet
+from payments.models import ServiceFeeConfig
+from users.models import User, EmployerProfile, WorkerProfile, JobCategory
+from users.tasks import send_welcome_email
 
+
+def create_user(role, email, phone):
+    """Verified user; creating one queues a welcome email, which is patched out"""
+    with mock.patch.object(send_welcome_email, 'delay'):
+        return User.objects.create_user(
+            email, phone, 'test-pass-123',
+            role=role, first_name='Test', last_name=role.title(),
+            email_verified=True, phone_verified=True
+        )
+
+
+class ContractTestCase(TestCase):
+    """An employer, a worker and a job category to contract them under"""
+    
+    @classmethod
+    def setUpTestData(cls):
+        cls.employer = EmployerProfile.objects.create(
+            user=create_user('employer', 'employer@example.com', '+256700000001'),
+            first_name='Test', last_name='Employer'
+        )
+        cls.worker = WorkerProfile.objects.create(
+            user=create_user('worker', 'worker@example.com', '+256700000002'),
+            first_name='Test', last_name='Worker'
+        )
+        cls.category = JobCategory.objects.create(name='Housekeeping')
+    
+    def create_contract(self, **fields):
+        return Contract.objects.create(**{
+            'employer': self.employer,
+            'worker': self.worker,
+            'category': self.category,
+            'job_title': 'Housekeeper',
+            'job_description': 'Cleaning and laundry',
+            'worker_salary_amount': 400000,
+            'service_fee_amount': 100000,
+            'start_date': date.today(),
+            **fields
+        })
+
+
+class ApproveReplacementTests(ContractTestCase):
+    """ContractManager.approve_replacement"""
+    
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.replacement_worker = WorkerProfile.objects.create(
+            user=create_user('worker', 'replacement@example.com', '+256700000003'),
+            first_name='New', last_name='Worker'
+        )
+    
+    def setUp(self):
+        self.contract = self.create_contract(status=Contract.ContractStatus.TRIAL)
+        self.replacement = ContractReplacement.objects.create(
+            original_contract=self.contract,
+            original_worker=self.worker,
+            reason='Not a good fit',
+            requested_by=self.employer.user
+        )
+    
+    def test_moves_the_contract_to_the_replacement_worker(self):
+        new_contract = ContractManager.approve_replacement(self.replacement, self.replacement_worker)
+        
+        self.assertEqual(new_contract.worker_id, self.replacement_worker.id)
+        self.assertEqual(new_contract.employer_id, self.employer.id)
+        self.assertEqual(new_contract.worker_salary_amount, 400000)
+        self.assertEqual(new_contract.total_monthly_cost, 500000)
+        
+        self.replacement.refresh_from_db()
+        self.assertEqual(self.replacement.status, ContractReplacement.ReplacementStatus.COMPLETED)
+        self.assertEqual(self.replacement.new_contract_id, new_contract.id)
+        self.assertEqual(self.replacement.replacement_worker_id, self.replacement_worker.id)
+        self.assertIsNotNone(self.replacement.completed_at)
+        
+        self.contract.refresh_from_db()
+        self.assertEqual(self.contract.status, Contract.ContractStatus.TERMINATED)
+        self.assertEqual(self.contract.termination_reason, 'Replaced by New Worker')
+        self.assertIsNotNone(self.contract.completed_at)
+        self.assertEqual(self.contract.updated_at, self.contract.completed_at)
+        
+        # bulk_update skips the post_save handler, so availability is set directly
+        self.worker.refresh_from_db()
+        self.replacement_worker.refresh_from_db()
+        self.assertEqual(self.worker.availability, 'available')
+        self.assertEqual(self.replacement_worker.availability, 'on_assignment')
+    
+    def test_rechecks_the_stored_replacement_status(self):
+        # Approved elsewhere since this instance was loaded
+        ContractReplacement.objects.filter(pk=self.replacement.pk).update(
+            status=ContractReplacement.ReplacementStatus.COMPLETED
+        )
+        
+        with self.assertRaisesMessage(ValueError, 'Only requested replacements can be approved'):
+            ContractManager.approve_replacement(self.replacement, self.replacement_worker)
+        
+        self.assertEqual(Contract.objects.count(), 1)
+        self.contract.refresh_from_db()
+        self.assertEqual(self.contract.status, Contract.ContractStatus.TRIAL)
+    
+    def test_rechecks_the_stored_worker_availability(self):
+        # Placed elsewhere since this instance was loaded
+        WorkerProfile.objects.filter(pk=self.replacement_worker.pk).update(availability='on_assignment')
+        
+        with self.assertRaisesMessage(ValueError, 'Replacement worker is not available'):
+            ContractManager.approve_replacement(self.replacement, self.replacement_worker)
+        
+        self.assertEqual(Contract.objects.count(), 1)
+        self.replacement.refresh_from_db()
+        self.assertEqual(self.replacement.status, ContractReplacement.ReplacementStatus.REQUESTED)
+
+
+class Rollback(Exception):
+    """Raised to roll back the enclosing atomic block"""
+
+
+@mock.patch('contracts.signals.send_contract_status_notification.delay')
+class ContractStatusSignalTests(ContractTestCase):
+    """Status change notifications from the Contract post_save handler"""
+    
+    def test_notifies_both_parties_once_committed(self, notify):
+        contract = self.create_contract()
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            contract.status = Contract.ContractStatus.TRIAL
+            contract.save(update_fields=['status', 'updated_at'])
+            notify.assert_not_called()
+        
+        self.assertEqual(notify.call_count, 2)
+        notify.assert_has_calls([
+            mock.call(str(contract.id), 'trial', str(self.employer.user_id)),
+            mock.call(str(contract.id), 'trial', str(self.worker.user_id)),
+        ], any_order=True)
+        
+        self.worker.refresh_from_db()
+        self.assertEqual(self.worker.availability, 'on_assignment')
+    
+    def test_rolled_back_change_does_not_notify(self, notify):
+        contract = self.create_contract()
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(Rollback):
+                with transaction.atomic():
+                    contract.status = Contract.ContractStatus.TRIAL
+                    contract.save()
+                    raise Rollback
+        
+        notify.assert_not_called()
+    
+    def test_saves_that_keep_the_status_do_not_notify(self, notify):
+        contract = self.create_contract()
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            contract.job_title = 'Nanny'
+            contract.save()
+            contract.status = Contract.ContractStatus.TRIAL
+            contract.save(update_fields=['job_title'])
+        
+        notify.assert_not_called()
+
+
+
+class FeeCalculatorTests(TestCase):
+    """Service fees are whole UGX, computed without floats"""
+    
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = JobCategory.objects.create(name='Driving')
+    
+    def setUp(self):
+        # Configurations are cached per category and day across tests
+        cache.clear()
+    
+    def configure(self, fee_type, **fields):
+        ServiceFeeConfig.objects.create(category=self.category, fee_type=fee_type, **fields)
+    
+    def fee(self, salary):
+        return FeeCalculator.calculate_service_fee(self.category.id, salary)
+    
+    def test_default_fee_is_a_quarter_of_salary_with_a_minimum(self):
+        self.assertEqual(self.fee(1_000_003), 250_000)
+        self.assertEqual(self.fee(300_000), 100_000)
+    
+    def test_percentage_fee_truncates_to_whole_ugx(self):
+        self.configure(ServiceFeeConfig.FeeCalculationType.PERCENTAGE, percentage=Decimal('12.50'))
+        
+        fee = self.fee(333_333)
+        
+        # 333,333 x 1,250 bp / 10,000 = 41,666.625
+        self.assertEqual(fee, 41_666)
+        self.assertIs(type(fee), int)
+    
+    def test_percentage_fee_keeps_hundredths_of_a_percent(self):
+        self.configure(ServiceFeeConfig.FeeCalculationType.PERCENTAGE, percentage=Decimal('0.07'))
+        
+        self.assertEqual(self.fee(10_000_000), 7_000)
+    
+    def test_minimum_and_maximum_fees_clamp_the_percentage(self):
+        self.configure(
+            ServiceFeeConfig.FeeCalculationType.PERCENTAGE,
+            percentage=Decimal('10.00'), minimum_fee=50_000, maximum_fee=200_000
+        )
+        
+        self.assertEqual(self.fee(100_000), 50_000)
+        self.assertEqual(self.fee(1_500_000), 150_000)
+        self.assertEqual(self.fee(5_000_000), 200_000)
+    
+    def test_fixed_fee(self):
+        self.configure(ServiceFeeConfig.FeeCalculationType.FIXED_AMOUNT, fixed_amount=120_000)
+        
+        self.assertEqual(self.fee(900_000), 120_000)
+    
+    def test_tiered_fee_uses_the_matching_or_highest_tier(self):
+        self.configure(ServiceFeeConfig.FeeCalculationType.TIERED, tier_config=[
+            {'min': 0, 'max': 500_000, 'fee': 80_000},
+            {'min': 500_001, 'max': 1_000_000, 'fee': 150_000},
+        ])
+        
+        self.assertEqual(self.fee(400_000), 80_000)
+        self.assertEqual(self.fee(750_000), 150_000)
+        self.assertEqual(self.fee(2_000_000), 150_000)
+    
+    def test_changed_configuration_is_not_served_from_cache(self):
+        self.configure(ServiceFeeConfig.FeeCalculationType.FIXED_AMOUNT, fixed_amount=120_000)
+        self.assertEqual(self.fee(900_000), 120_000)
+        
+        ServiceFeeConfig.objects.get(category=self.category).delete()
+        
+        self.assertEqual(self.fee(900_000), 225_000)
+
+
+
+@mock.patch('contracts.signals.send_contract_status_notification.delay')
+class ContractSignTests(ContractTestCase):
+    """ContractViewSet.sign"""
+    
+    def setUp(self):
+        self.contract = self.create_contract()
+    
+    def sign(self, user):
+        request = APIRequestFactory().post('', {
+            'signature_data': 'data:image/png;base64,iVBORw0KGgo=',
+            'agreed_to_terms': True
+        }, format='json')
+        force_authenticate(request, user=user)
+        return ContractViewSet.as_view({'post': 'sign'})(request, pk=str(self.contract.pk))
+    
+    def test_locks_the_contract_row(self, notify):
+        view = ContractViewSet(action='sign', request=mock.Mock(user=self.employer.user))
+        
+        query = view.get_queryset().query
+        self.assertTrue(query.select_for_update)
+        self.assertEqual(query.select_for_update_of, ('self',))
+    
+    def test_first_signature_keeps_the_draft(self, notify):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.sign(self.employer.user)
+        
+        self.assertEqual(response.status_code, 200)
+        self.contract.refresh_from_db()
+        self.assertTrue(self.contract.signed_by_employer)
+        self.assertIsNotNone(self.contract.employer_signature_date)
+        self.assertFalse(self.contract.signed_by_worker)
+        self.assertEqual(self.contract.status, Contract.ContractStatus.DRAFT)
+        notify.assert_not_called()
+    
+    def test_second_signature_starts_the_trial(self, notify):
+        # The employer's signature is only in the database, so the view has to
+        # read the row it locks rather than trust an earlier copy
+        Contract.objects.filter(pk=self.contract.pk).update(signed_by_employer=True)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.sign(self.worker.user)
+        
+        self.assertEqual(response.status_code, 200)
+        self.contract.refresh_from_db()
+        self.assertTrue(self.contract.signed_by_employer)
+        self.assertTrue(self.contract.signed_by_worker)
+        self.assertEqual(self.contract.status, Contract.ContractStatus.TRIAL)
+        self.assertIsNotNone(self.contract.activated_at)
+        self.assertEqual(notify.call_count, 2)
+    
+    def test_invalid_signature_changes_nothing(self, notify):
+        request = APIRequestFactory().post('', {'signature_data': 'x'}, format='json')
+        force_authenticate(request, user=self.employer.user)
+        
+        response = ContractViewSet.as_view({'post': 'sign'})(request, pk=str(self.contract.pk))
+        
+        self.assertEqual(response.status_code, 400)
+        self.contract.refresh_from_db()
+        self.assertFalse(self.contract.signed_by_employer)
+    
+    def test_only_the_parties_can_sign(self, notify):
+        admin = create_user('admin', 'admin@example.com', '+256700000009')
+        
+        response = self.sign(admin)
+        
+        self.assertEqual(response.status_code, 403)
+        self.contract.refresh_from_db()
+        self.assertFalse(self.contract.signed_by_employer)
+        self.assertFalse(self.contract.signed_by_worker)
@@ -2,7 +2,9 @@ from rest_framework import viewsets, status, permissions, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.renderers import BrowsableAPIRenderer
 from django_filters.rest_framework import DjangoFilterBackend
+from django.db import transaction
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from datetime import date
@@ -16,6 +18,8 @@ from .serializers import (
 from .services.contract_manager import ContractManager
 from .services.document_generator import ContractDocumentGenerator
 from users.permissions import IsEmployer, IsWorker, IsContractParty, IsAdmin, IsVerifiedUser
+from workconnect.renderers import ORJSONRenderer
+from notifications.tasks import send_notification_task
 
 
 class StandardPagination(PageNumberPagination):
@@ -29,6 +33,7 @@ class ContractViewSet(viewsets.ModelViewSet):
     
     serializer_class = ContractSerializer
     permission_classes = [permissions.IsAuthenticated, IsVerifiedUser]
+    renderer_classes = [ORJSONRenderer, BrowsableAPIRenderer]
     pagination_class = StandardPagination
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['status', 'contract_type', 'is_trial']
@@ -40,21 +45,30 @@ class ContractViewSet(viewsets.ModelViewSet):
         """Filter queryset based on user role"""
         user = self.request.user
         
+        contracts = Contract.objects.all()
+        if self.action == 'list':
+            # Skip the columns the list serializer doesn't render
+            contracts = Contract.objects.lean(*ContractSerializer.Meta.fields)
+        contracts = ContractSerializer.prefetch_queryset(contracts)
+        if self.action == 'sign':
+            # Hold the contract row for the whole signing transaction
+            contracts = contracts.select_for_update(of=('self',))
+        
         if user.role == 'employer':
             # Employers can see their own contracts
             employer_profile = user.employer_profile
-            return Contract.objects.filter(employer=employer_profile)
+            return contracts.filter(employer=employer_profile)
         
         elif user.role == 'worker':
             # Workers can see their own contracts
             worker_profile = user.worker_profile
-            return Contract.objects.filter(worker=worker_profile)
+            return contracts.filter(worker=worker_profile)
         
         elif user.role in ['admin', 'super_admin']:
             # Admins can see all contracts
-            return Contract.objects.all()
+            return contracts
         
-        return Contract.objects.none()
+        return contracts.none()
     
     def get_serializer_class(self):
         """Use appropriate serializer based on action"""
@@ -107,21 +121,15 @@ class ContractViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        try:
-            # Generate PDF document
-            generator = ContractDocumentGenerator(contract)
-            pdf_url = generator.generate()
-            
-            return Response({
-                'contract_document_url': pdf_url,
-                'message': 'Contract document generated successfully'
-            }, status=status.HTTP_200_OK)
-            
-        except Exception as e:
-            return Response(
-                {'error': f'Failed to generate document: {str(e)}'},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
+        # Rendering and uploading the PDF runs in a worker; the URL shows up
+        # on document_url once it is ready
+        from .tasks import generate_contract_document
+        generate_contract_document.delay(str(contract.id))
+        
+        return Response({
+            'status': 'pending',
+            'message': 'Contract document generation started'
+        }, status=status.HTTP_202_ACCEPTED)
     
     @action(detail=True, methods=['get'])
     def document_url(self, request, pk=None):
@@ -134,9 +142,9 @@ class ContractViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_404_NOT_FOUND
             )
         
-        # Generate signed URL (expires in 1 hour)
+        # Generate signed URL (expires in 1 hour); a cached one may have less left
         generator = ContractDocumentGenerator(contract)
-        signed_url = generator.get_signed_url(expires_in=3600)
+        signed_url, expires_in = generator.get_signed_url_with_expiry(expires_in=3600)
         
         if not signed_url:
             return Response(
@@ -146,12 +154,15 @@ class ContractViewSet(viewsets.ModelViewSet):
         
         return Response({
             'signed_url': signed_url,
-            'expires_in': 3600
+            'expires_in': expires_in
         }, status=status.HTTP_200_OK)
     
     @action(detail=True, methods=['post'])
+    @transaction.atomic
     def sign(self, request, pk=None):
         """Sign contract by employer or worker"""
+        # Locked by get_queryset, so two parties signing at the same time
+        # can't each miss the other's signature
         contract = self.get_object()
         user = request.user
         serializer = self.get_serializer(data=request.data)
@@ -164,11 +175,13 @@ class ContractViewSet(viewsets.ModelViewSet):
             contract.signed_by_employer = True
             contract.employer_signature_date = timezone.now()
             contract.signature_data_employer = serializer.validated_data['signature_data']
+            update_fields = ['signed_by_employer', 'employer_signature_date', 'signature_data_employer']
         
         elif user.role == 'worker' and contract.worker.user == user:
             contract.signed_by_worker = True
             contract.worker_signature_date = timezone.now()
             contract.signature_data_worker = serializer.validated_data['signature_data']
+            update_fields = ['signed_by_worker', 'worker_signature_date', 'signature_data_worker']
         
         else:
             return Response(
@@ -176,16 +189,14 @@ class ContractViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        # Check if both parties have signed
+        # Check if both parties have signed; the status change notifies both
+        # parties from the post_save handler once the transaction commits
         if contract.signed_by_employer and contract.signed_by_worker:
             contract.status = Contract.ContractStatus.TRIAL
             contract.activated_at = timezone.now()
-            
-            # Send notifications
-            from notifications.tasks import send_contract_signed_notification
-            send_contract_signed_notification.delay(contract.id)
+            update_fields += ['status', 'activated_at']
         
-        contract.save()
+        contract.save(update_fields=update_fields + ['updated_at'])
         
         return Response(ContractSerializer(contract).data, status=status.HTTP_200_OK)
     
@@ -224,6 +235,7 @@ class ContractViewSet(viewsets.ModelViewSet):
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
     
     @action(detail=True, methods=['post'])
+    @transaction.atomic
     def trial_feedback(self, request, pk=None):
         """Submit feedback during trial period"""
         contract = self.get_object()
@@ -247,15 +259,20 @@ class ContractViewSet(viewsets.ModelViewSet):
             )
         
         contract.trial_feedback = serializer.validated_data['feedback_text']
-        contract.save()
+        contract.save(update_fields=['trial_feedback', 'updated_at'])
         
         # Notify worker about feedback
-        from notifications.tasks import send_trial_feedback_notification
-        send_trial_feedback_notification.delay(
-            contract.worker.user.id,
-            contract.id,
-            serializer.validated_data['performance_rating']
-        )
+        worker_user_id = str(contract.worker.user_id)
+        rating = serializer.validated_data['performance_rating']
+        transaction.on_commit(lambda: send_notification_task.delay(
+            user_id=worker_user_id,
+            notification_type='contract',
+            title='Trial Feedback Received',
+            message=f"Your employer left feedback on your trial for '{contract.job_title}' ({rating}/5).",
+            action_url=f"/contracts/{contract.id}",
+            action_text='View Contract',
+            data={'contract_id': str(contract.id), 'performance_rating': rating}
+        ))
         
         return Response({
             'message': 'Feedback submitted successfully',
@@ -302,6 +319,7 @@ class ContractViewSet(viewsets.ModelViewSet):
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
     
     @action(detail=True, methods=['post'])
+    @transaction.atomic
     def complete_trial(self, request, pk=None):
         """Complete trial period successfully"""
         contract = self.get_object()
@@ -346,9 +364,8 @@ class ContractViewSet(viewsets.ModelViewSet):
                     is_verified=True
                 )
             
-            # Send completion notifications
-            from notifications.tasks import send_trial_completion_notification
-            send_trial_completion_notification.delay(contract.id, True)
+            # Both parties are notified of the trial -> active change by the
+            # contract post_save handler once the transaction commits
             
             return Response({
                 'message': 'Trial completed successfully',
@@ -359,6 +376,7 @@ class ContractViewSet(viewsets.ModelViewSet):
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
     
     @action(detail=True, methods=['post'])
+    @transaction.atomic
     def terminate(self, request, pk=None):
         """Terminate contract"""
         contract = self.get_object()
@@ -375,12 +393,8 @@ class ContractViewSet(viewsets.ModelViewSet):
                 request.user
             )
             
-            # Send termination notifications
-            from notifications.tasks import send_contract_termination_notification
-            send_contract_termination_notification.delay(
-                contract.id,
-                serializer.validated_data['reason']
-            )
+            # Both parties are notified of the termination by the contract
+            # post_save handler once the transaction commits
             
             return Response({
                 'message': 'Contract terminated successfully',
@@ -428,24 +442,26 @@ class ReplacementViewSet(viewsets.ModelViewSet):
     
     serializer_class = ReplacementSerializer
     permission_classes = [permissions.IsAuthenticated, IsVerifiedUser]
+    renderer_classes = [ORJSONRenderer, BrowsableAPIRenderer]
     pagination_class = StandardPagination
     
     def get_queryset(self):
         """Filter queryset based on user role"""
         user = self.request.user
+        replacements = ReplacementSerializer.prefetch_queryset(ContractReplacement.objects.all())
         
         if user.role == 'employer':
             # Employers can see their replacement requests
             employer_profile = user.employer_profile
-            return ContractReplacement.objects.filter(
+            return replacements.filter(
                 original_contract__employer=employer_profile
             )
         
         elif user.role in ['admin', 'super_admin']:
             # Admins can see all replacement requests
-            return ContractReplacement.objects.all()
+            return replacements
         
-        return ContractReplacement.objects.none()
+        return replacements.none()
     
     def get_permissions(self):
         """Set permissions based on action"""
@@ -507,27 +523,29 @@ class ContractDocumentViewSet(viewsets.ModelViewSet):
     
     serializer_class = ContractDocumentSerializer
     permission_classes = [permissions.IsAuthenticated, IsVerifiedUser, IsContractParty]
+    renderer_classes = [ORJSONRenderer, BrowsableAPIRenderer]
     
     def get_queryset(self):
         """Filter documents based on user's contracts"""
         user = self.request.user
+        documents = ContractDocumentSerializer.prefetch_queryset(ContractDocument.objects.all())
         
         if user.role == 'employer':
             employer_profile = user.employer_profile
-            return ContractDocument.objects.filter(
+            return documents.filter(
                 contract__employer=employer_profile
             )
         
         elif user.role == 'worker':
             worker_profile = user.worker_profile
-            return ContractDocument.objects.filter(
+            return documents.filter(
                 contract__worker=worker_profile
             )
         
         elif user.role in ['admin', 'super_admin']:
-            return ContractDocument.objects.all()
+            return documents
         
-        return ContractDocument.objects.none()
+        return documents.none()
     
     def perform_create(self, serializer):
         """Assign uploaded by user"""
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.10 on 2026-10-16 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('job_postings', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='jobposting',
+            index=models.Index(condition=models.Q(('status', 'active')), fields=['status'], name='job_postings_active_idx'),
+        ),
+    ]
@@ -68,6 +68,11 @@ class JobPosting(models.Model):
             models.Index(fields=['status']),
             models.Index(fields=['category']),
             models.Index(fields=['created_at']),
+            models.Index(
+                fields=['status'],
+                name='job_postings_active_idx',
+                condition=models.Q(status='active')
+            ),
         ]
     
     def __str__(self):
@@ -126,6 +126,7 @@ class Message(models.Model):
             models.Index(fields=['receiver', 'created_at']),
             models.Index(fields=['is_read']),
             models.Index(fields=['created_at']),
+            models.Index(fields=['is_system_message', 'created_at']),
         ]
     
     def __str__(self):
@@ -323,7 +323,9 @@ def send_trial_period_reminder(contract_id, days_remaining):
     from contracts.models import Contract
     
     try:
-        contract = Contract.objects.get(id=contract_id)
+        contract = Contract.objects.select_related(
+            'employer__user', 'worker__user'
+        ).get(id=contract_id)
         employer = contract.employer.user
         worker = contract.worker.user
         
@@ -375,6 +375,7 @@ class PaymentTransaction(models.Model):
             models.Index(fields=['initiated_at']),
             models.Index(fields=['payer_user']),
             models.Index(fields=['payee_user']),
+            models.Index(fields=['status', 'transaction_type', 'completed_at']),
         ]
         ordering = ['-initiated_at']
     
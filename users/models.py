@@ -112,6 +112,7 @@ class User(AbstractBaseUser, PermissionsMixin):
             models.Index(fields=['phone']),
             models.Index(fields=['role']),
             models.Index(fields=['status']),
+            models.Index(fields=['role', 'created_at']),
         ]
     
     def __str__(self):
@@ -387,6 +388,7 @@ class WorkerProfile(models.Model):
         choices=VerificationStatus.choices,
         default=VerificationStatus.PENDING
     )
+    ai_processed = models.BooleanField(default=False)
     
     # Reputation metrics
     trust_score = models.IntegerField(default=0, validators=[MinValueValidator(0), MaxValueValidator(100)])
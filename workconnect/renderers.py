@@ -0,0 +1,19 @@
+# workconnect/renderers.py
+import orjson
+from rest_framework import renderers
+from rest_framework.utils.encoders import JSONEncoder
+
+
+class ORJSONRenderer(renderers.JSONRenderer):
+    """JSON renderer backed by orjson"""
+    
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        
+        # Fall back to DRF's encoder for types orjson doesn't know (Decimal, lazy strings, ...)
+        return orjson.dumps(
+            data,
+            default=JSONEncoder().default,
+            option=orjson.OPT_NON_STR_KEYS
+        )
@@ -5,6 +5,7 @@ Django settings for WorkConnect Uganda project.
 import os
 from datetime import timedelta
 from pathlib import Path
+from celery.schedules import crontab
 from decouple import config
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -157,6 +158,9 @@ STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Largest non-file request body read into memory (base64 signatures included)
+DATA_UPLOAD_MAX_MEMORY_SIZE = config('DATA_UPLOAD_MAX_MEMORY_SIZE', default=2 * 1024 * 1024, cast=int)
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -232,6 +236,20 @@ CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
+CELERY_BEAT_SCHEDULE = {
+    'calculate-daily-metrics': {
+        'task': 'analytics.tasks.calculate_daily_metrics_task',
+        'schedule': crontab(hour=0, minute=30),  # Previous day's metrics
+    },
+    'refresh-leaderboards': {
+        'task': 'analytics.tasks.refresh_leaderboards',
+        'schedule': crontab(hour=1, minute=0),
+    },
+    'drain-activity-buffer': {
+        'task': 'analytics.tasks.drain_activity_buffer',
+        'schedule': 5.0,  # seconds
+    },
+}
 
 # File Storage (AWS S3 or DigitalOcean Spaces)
 USE_S3 = config('USE_S3', default=False, cast=bool)
@@ -277,6 +295,9 @@ AFRICASTALKING_SENDER_ID = config('AFRICASTALKING_SENDER_ID', default='WorkConne
 # SMS Settings
 SMS_ENABLED = config('SMS_ENABLED', default=False, cast=bool)  # Set to False for dev testing
 
+# Analytics: seconds that live metric endpoints (today, summary, revenue) are cached
+ANALYTICS_METRICS_CACHE_TTL = config('ANALYTICS_METRICS_CACHE_TTL', default=300, cast=int)
+
 # Logging Configuration
 LOGGING = {
     'version': 1,
@@ -319,6 +340,11 @@ LOGGING = {
             'level': 'INFO',
             'propagate': False,
         },
+        'contracts': {
+            'handlers': ['console', 'file'],
+            'level': 'INFO',
+            'propagate': False,
+        },
     },
 }
 
@@ -55,3 +55,11 @@ CORS_ALLOWED_ORIGINS = [
     'https://www.workconnect.ug',
     'https://admin.workconnect.ug',
 ]
+
+# Redis cache (OTP codes, AI response caches)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': REDIS_URL,
+    }
+}